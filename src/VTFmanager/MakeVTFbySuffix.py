@@ -1,8 +1,25 @@
 import os
 import json
-import subprocess
+import copy
 import argparse
 import re
+import sys
+import time
+import shutil
+import tempfile
+
+try:
+    from ..lib.jobs import (JobResult, CancelToken, CACHED, FAILED, CANCELLED, SKIPPED, is_cancelled, report,
+                            parse_jobs, stop_process, watch_cancel)
+    from ..lib.checkpoint import Journal, fingerprint
+    from ..lib.fileops import replace_file
+except ImportError:
+    # run as a script: sets the parent dir to the src folder
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from lib.jobs import (JobResult, CancelToken, CACHED, FAILED, CANCELLED, SKIPPED, is_cancelled, report,
+                          parse_jobs, stop_process, watch_cancel)
+    from lib.checkpoint import Journal, fingerprint
+    from lib.fileops import replace_file
 
 # --------------------------------------------------------------------
 # Constants and Defaults
@@ -13,6 +30,8 @@ DEFAULT_VTFCMD = os.path.join(os.path.dirname(__file__), 'VTFCmd')
 
 DEFAULT_CONFIG = {
     "vtfcmd_path": "{DEFAULT_VTFCMD}VTFCmd.exe",
+    "cache_dir": None,
+    "cache_max_mb": 0,
     "rules": {
         "_normal": {"format": "RGBA8888", "alphaformat": "RGBA8888", "extra_flags": ["-nomipmaps"]},
         "_alpha":  {"format": "DXT5",     "alphaformat": "DXT5",     "extra_flags": ["-nomipmaps"]},
@@ -22,26 +41,59 @@ DEFAULT_CONFIG = {
 }
 
 SUPPORTED_EXTENSIONS = ['.tga', '.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.dds']
+CACHE_ENV = 'LAMBDA_VTF_CACHE'
+DEFAULT_JOURNAL = 'vtf_journal.jsonl'
+DEFAULT_HISTORY = 'job_history.json'
+
+# parsed config keyed by (path, mtime) so repeated calls in one process
+# don't hit the disk or the json parser again
+_config_cache = {}
+
+# the cache module pulls in threading, only load it when a cache is configured
+def _vtf_cache():
+    try:
+        from . import vtf_cache
+    except ImportError:
+        import vtf_cache
+    return vtf_cache
+
+# the scheduler pulls in threading/queue, only load it for parallel runs
+def _scheduler():
+    try:
+        from ..lib import scheduler
+    except ImportError:
+        from lib import scheduler
+    return scheduler
 
 # --------------------------------------------------------------------
 # Configuration Management
 # --------------------------------------------------------------------
 
+def default_config():
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config["vtfcmd_path"] = config["vtfcmd_path"].replace(
+        "{DEFAULT_VTFCMD}", DEFAULT_VTFCMD + os.sep
+    )
+    return config
+
+# returns the defaults without writing them when there is no config file yet.
+# the file is only created by the config manager
 def load_config():
-    if not os.path.exists(CONFIG_FILE):
-        config = json.loads(json.dumps(DEFAULT_CONFIG))
-        config["vtfcmd_path"] = config["vtfcmd_path"].replace(
-            "{DEFAULT_VTFCMD}", DEFAULT_VTFCMD + os.sep
-        )
-        save_config(config)
-        return config
+    try:
+        stamp = (CONFIG_FILE, os.stat(CONFIG_FILE).st_mtime_ns)
+    except OSError:
+        return default_config()
 
-    with open(CONFIG_FILE, 'r') as f:
-        return json.load(f)
+    if stamp not in _config_cache:
+        with open(CONFIG_FILE, 'r') as f:
+            _config_cache.clear()
+            _config_cache[stamp] = json.load(f)
+    return copy.deepcopy(_config_cache[stamp])
 
 def save_config(config):
     with open(CONFIG_FILE, 'w') as f:
         json.dump(config, f, indent=4)
+    _config_cache.clear()
     print(f"Config saved to {CONFIG_FILE}.")
 
 def print_rules(rules):
@@ -142,10 +194,7 @@ def config_manager():
 
         elif choice == '6':
             if input("Reset all settings to defaults? This cannot be undone. (y/n): ").lower() == 'y':
-                config = json.loads(json.dumps(DEFAULT_CONFIG))
-                config["vtfcmd_path"] = config["vtfcmd_path"].replace(
-                    "{DEFAULT_VTFCMD}", DEFAULT_VTFCMD + os.sep
-                )
+                config = default_config()
                 save_config(config)
                 print("Settings reset to defaults.")
 
@@ -166,18 +215,45 @@ def get_rule_for_file(rules, filename):
             return rule
     return rules.get("default")
 
-def run_vtfcmd(file_path, output_path, vtfcmd_path, rule):
+def vtf_output_path(file_path, output_path):
+    # VTFCmd names the output after the input file
+    return os.path.join(output_path, os.path.splitext(os.path.basename(file_path))[0] + '.vtf')
+
+def texture_fingerprint(file_path, output_path, vtfcmd_path, rule):
+    return fingerprint([file_path], {"output": os.path.abspath(output_path), "vtfcmd": vtfcmd_path, "rule": rule})
+
+# converts one texture and returns a JobResult. nothing is printed.
+# VTFCmd writes into a hidden staging folder next to the output and the vtf
+# is moved into place only when it finished, so Ctrl-C or a crash never
+# leaves a half-written vtf behind. a cancelled token stops VTFCmd
+def convert_texture(file_path, output_path, vtfcmd_path, rule, cache=None, cancel=None):
+    result = JobResult('vtf', file_path, output=vtf_output_path(file_path, output_path))
+    start = time.perf_counter()
+
     if not os.path.exists(file_path):
-        print(f"[X] Input file not found: {file_path}")
-        return False
+        result.status = FAILED
+        result.add_diagnostic(f"Input file not found: {file_path}")
+        return result
 
     os.makedirs(output_path, exist_ok=True)
 
+    key = None
+    if cache:
+        key = cache.key_for(file_path, rule, vtfcmd_path)
+        if cache.fetch(key, result.output):
+            result.status = CACHED
+            result.elapsed = time.perf_counter() - start
+            return result
+
+    # VTFCmd writes into a staging folder and the result is swapped in, so a
+    # vtf hardlinked from the cache is replaced, never overwritten in place
+    staging = tempfile.mkdtemp(prefix='.vtfcmd-', dir=output_path)
+
     cmd = [
         vtfcmd_path,
         '-file', file_path,
         '-format', rule['format'],
-        '-output', output_path
+        '-output', staging
     ]
 
     if rule.get('alphaformat'):
@@ -185,26 +261,133 @@ def run_vtfcmd(file_path, output_path, vtfcmd_path, rule):
     if rule.get('extra_flags'):
         cmd += rule['extra_flags']
 
+    # subprocess adds a few ms to every launch (startup_vtf), so it loads on
+    # the first conversion
+    import subprocess
+    process = None
     try:
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
-        print(f"[✓] Converted: {file_path}")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"[X] Failed: {file_path}")
-        print("STDOUT:", e.stdout)
-        print("STDERR:", e.stderr)
-        return False
-
-def batch_convert_folder(input_folder, output_folder, vtfcmd_path, rules):
-    if not os.path.exists(input_folder):
-        print(f"Input folder not found: {input_folder}")
-        return
-
-    for file in os.listdir(input_folder):
-        if any(file.lower().endswith(ext) for ext in SUPPORTED_EXTENSIONS):
-            file_path = os.path.join(input_folder, file)
-            rule = get_rule_for_file(rules, file)
-            run_vtfcmd(file_path, output_folder, vtfcmd_path, rule)
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        watcher = watch_cancel(process, cancel)
+        stdout, stderr = process.communicate()
+        result.returncode = process.returncode
+        if watcher["stopped"] and process.returncode != 0:
+            result.status = CANCELLED
+        elif process.returncode != 0:
+            result.status = FAILED
+            result.add_diagnostic(f"STDOUT: {stdout}")
+            result.add_diagnostic(f"STDERR: {stderr}")
+        else:
+            replace_file(vtf_output_path(file_path, staging), result.output)
+            if key and os.path.isfile(result.output):
+                try:
+                    cache.store(key, result.output)
+                except OSError as e:
+                    result.add_diagnostic(f"Could not add to VTF cache: {e}")
+    except OSError as e:
+        result.status = FAILED
+        result.add_diagnostic(f"Could not run VTFCmd: {e}")
+    finally:
+        if process:
+            stop_process(process)
+        shutil.rmtree(staging, ignore_errors=True)
+
+    result.elapsed = time.perf_counter() - start
+    return result
+
+def print_vtf_result(result):
+    if result.kind == 'folder':
+        print(f"Input folder not found: {result.input}")
+    elif result.status == SKIPPED:
+        print(f"[-] Skipped (already converted): {result.input}")
+    elif result.status == CACHED:
+        print(f"[=] Cached: {result.input}")
+    elif result.status == CANCELLED:
+        print(f"[-] Cancelled: {result.input}")
+    elif result.ok:
+        print(f"[✓] Converted: {result.input}")
+        for line in result.diagnostics:
+            print(f"[!] {line}")
+    elif result.returncode is None and result.diagnostics:
+        print(f"[X] {result.diagnostics[0]}")
+    else:
+        print(f"[X] Failed: {result.input}")
+        for line in result.diagnostics:
+            print(line)
+
+def run_vtfcmd(file_path, output_path, vtfcmd_path, rule, cache=None):
+    result = convert_texture(file_path, output_path, vtfcmd_path, rule, cache)
+    print_vtf_result(result)
+    return result.ok
+
+def list_textures(input_folder):
+    return [os.path.join(input_folder, file) for file in os.listdir(input_folder)
+            if any(file.lower().endswith(ext) for ext in SUPPORTED_EXTENSIONS)]
+
+# yields a JobResult per texture as each conversion finishes. a missing
+# input folder comes back as one failed result of kind 'folder'. with a
+# journal, textures converted earlier with unchanged inputs are skipped and
+# every finished conversion is checkpointed. with an AdaptiveScheduler the
+# conversions run in parallel and results come in completion order
+def iter_convert_folder(input_folder, output_folder, vtfcmd_path, rules, cache=None, progress=None, cancel=None,
+                        journal=None, scheduler=None):
+    yield from iter_convert_list([(input_folder, output_folder)], vtfcmd_path, rules, cache,
+                                 progress=progress, cancel=cancel, journal=journal, scheduler=scheduler)
+
+# same as iter_convert_folder over (input, output) pairs from read_io_list
+def iter_convert_list(pairs, vtfcmd_path, rules, cache=None, progress=None, cancel=None, journal=None,
+                      scheduler=None):
+    plan = []
+    for input_folder, output_folder in pairs:
+        if not os.path.exists(input_folder):
+            plan.append((input_folder, None, None))
+            continue
+        for file_path in list_textures(input_folder):
+            plan.append((file_path, output_folder, get_rule_for_file(rules, os.path.basename(file_path))))
+
+    def convert_one(file_path, output_folder, rule, job_fingerprint):
+        result = convert_texture(file_path, output_folder, vtfcmd_path, rule, cache, cancel)
+        if journal and result.status != CANCELLED:
+            journal.record(result.output, job_fingerprint, result.status, result.elapsed)
+        return result
+
+    done = 0
+    jobs = []
+    for file_path, output_folder, rule in plan:
+        if is_cancelled(cancel):
+            return
+        if output_folder is None:
+            result = JobResult('folder', file_path, status=FAILED,
+                               diagnostics=[f"Input folder not found: {file_path}"])
+        else:
+            output = vtf_output_path(file_path, output_folder)
+            job_fingerprint = texture_fingerprint(file_path, output_folder, vtfcmd_path, rule) if journal else None
+            if journal and journal.is_done(output, job_fingerprint) and os.path.isfile(output):
+                result = JobResult('vtf', file_path, output=output, status=SKIPPED)
+            elif scheduler:
+                jobs.append(scheduler.Job(file_path,
+                                          lambda f=file_path, o=output_folder, r=rule, fp=job_fingerprint: convert_one(f, o, r, fp),
+                                          kind='vtf', size=os.path.getsize(file_path)))
+                continue
+            else:
+                result = convert_one(file_path, output_folder, rule, job_fingerprint)
+        done += 1
+        report(progress, result, done, len(plan))
+        yield result
+
+    if jobs:
+        for job, result in scheduler.run(jobs, cancel=cancel):
+            if isinstance(result, Exception):
+                result = JobResult('vtf', job.key, status=FAILED, diagnostics=[str(result)])
+            done += 1
+            report(progress, result, done, len(plan))
+            yield result
+
+def batch_convert_folder(input_folder, output_folder, vtfcmd_path, rules, cache=None, journal=None):
+    results = []
+    for result in iter_convert_folder(input_folder, output_folder, vtfcmd_path, rules, cache, journal=journal):
+        print_vtf_result(result)
+        results.append(result)
+    return results
 
 # --------------------------------------------------------------------
 # Input/Output List Parser
@@ -234,8 +417,18 @@ def read_io_list(file_path):
 # Main CLI Handler
 # --------------------------------------------------------------------
 
-def main():
+def open_cache(args, config):
+    if args.nocache:
+        return None
+    cache_dir = args.cache or os.environ.get(CACHE_ENV) or config.get('cache_dir')
+    if not cache_dir:
+        return None
+    max_mb = args.cachemax if args.cachemax is not None else config.get('cache_max_mb', 0)
+    return _vtf_cache().VTFCache(cache_dir, max_bytes=(max_mb or 0) * 1024 * 1024)
+
+def main(argv=None, prog=None):
     parser = argparse.ArgumentParser(
+        prog=prog,
         description="Batch convert textures to VTF format using VTFCmd.",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
@@ -244,29 +437,80 @@ def main():
     parser.add_argument('-vtfcmd', '-v', help="Path to VTFCmd.exe (overrides config).")
     parser.add_argument('--config', '-c', action='store_true', help="Open config manager.")
     parser.add_argument('-list', '-l', help='Text file with input/output folders: input="..." output="..."')
-
-    args = parser.parse_args()
-    config = load_config()
+    parser.add_argument('-cache', help=f"Shared VTF cache folder (overrides config and ${CACHE_ENV}).")
+    parser.add_argument('-cachemax', type=int, help="Evict least recently used cache entries above this size in MB.")
+    parser.add_argument('-nocache', action='store_true', help="Always convert, ignoring the VTF cache.")
+    parser.add_argument('-cachestats', action='store_true', help="Print VTF cache statistics and exit.")
+    parser.add_argument('-resume', '--resume', action='store_true', help="Skip textures converted in the last run with unchanged inputs.")
+    parser.add_argument('-journal', default=DEFAULT_JOURNAL, help="Checkpoint journal used by -resume.")
+    parser.add_argument('-jobs', type=parse_jobs, default=1, help="Max parallel conversions, or 'auto' for one per CPU. Scaled down under CPU, memory or disk pressure.")
+    parser.add_argument('-history', default=DEFAULT_HISTORY, help="Past job timings used to schedule parallel conversions.")
+    parser.add_argument('-report', help="Write a JSON run report with every result and the scheduler's decisions.")
+
+    args = parser.parse_args(argv)
 
     if args.config:
         config_manager()
         return
 
-    vtfcmd_path = args.vtfcmd or config['vtfcmd_path']
+    if not (args.list or args.input or args.cachestats):
+        print("No input folder specified. Use --input/-i or --list/-l.")
+        parser.print_help()
+        return
 
-    if args.list:
-        for input_folder, output_folder in read_io_list(args.list):
-            print(f"\nProcessing input: {input_folder}")
-            print(f"Output folder: {output_folder}")
-            batch_convert_folder(input_folder, output_folder, vtfcmd_path, config['rules'])
+    config = load_config()
 
-    elif args.input:
-        output_folder = args.output or args.input
-        batch_convert_folder(args.input, output_folder, vtfcmd_path, config['rules'])
+    vtfcmd_path = args.vtfcmd or config['vtfcmd_path']
+    cache = open_cache(args, config)
+
+    if args.cachestats:
+        if not cache:
+            print("No VTF cache configured. Use -cache, the config or $" + CACHE_ENV + ".")
+            return
+        print(f"VTF cache: {cache.root}")
+        print(f"Size: {cache.size() / (1024 * 1024):.1f} MB")
+        print(f"Totals: {cache.summary(cache.load_stats())}")
+        return
 
-    else:
-        print("No input folder specified. Use --input/-i or --list/-l.")
-        parser.print_help()
+    journal = Journal(args.journal, resume=args.resume)
+    results = []
+    scheduler = None
+
+    try:
+        if args.jobs > 1:
+            pairs = read_io_list(args.list) if args.list else [(args.input, args.output or args.input)]
+            scheduler = _scheduler().AdaptiveScheduler(max_jobs=args.jobs,
+                                                       cost_model=_scheduler().CostModel(args.history))
+            for result in iter_convert_list(pairs, vtfcmd_path, config['rules'], cache, cancel=CancelToken(),
+                                            journal=journal, scheduler=scheduler):
+                print_vtf_result(result)
+                results.append(result)
+
+        elif args.list:
+            for input_folder, output_folder in read_io_list(args.list):
+                print(f"\nProcessing input: {input_folder}")
+                print(f"Output folder: {output_folder}")
+                results += batch_convert_folder(input_folder, output_folder, vtfcmd_path, config['rules'], cache, journal)
+
+        elif args.input:
+            output_folder = args.output or args.input
+            results += batch_convert_folder(args.input, output_folder, vtfcmd_path, config['rules'], cache, journal)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted. Finished textures are saved in {args.journal}, run again with -resume to continue.")
+        if cache:
+            cache.save_stats()
+        sys.exit(130)
+
+    if cache:
+        cache.evict()
+        cache.save_stats()
+        print(f"\nVTF cache: {cache.summary()}")
+
+    if scheduler:
+        _scheduler().print_report(scheduler.report())
+    if args.report:
+        _scheduler().write_run_report(args.report, results, scheduler)
+        print(f"Run report written to {args.report}")
 
 # --------------------------------------------------------------------
 # call
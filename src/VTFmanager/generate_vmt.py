@@ -0,0 +1,491 @@
+import json
+import sys
+import os
+import re
+import copy
+import time
+import argparse
+
+try:
+    from ..lib.smd_materials import read_materials_many
+    from ..lib.jobs import JobResult, FAILED, is_cancelled, report
+    from .vmt_check import TEXTURE_PARAMS, validate_vmts, unified_diff
+except ImportError:
+    # run as a script: sets the parent dir to the src folder
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from lib.smd_materials import read_materials_many
+    from lib.jobs import JobResult, FAILED, is_cancelled, report
+    from VTFmanager.vmt_check import TEXTURE_PARAMS, validate_vmts, unified_diff
+
+# Paths
+tmp_dir = r"D:\programs\source engine utils\test_files"
+CONFIG = os.path.join(os.path.dirname(__file__), 'config', 'vtf_suffix_matching.json')
+
+# parsed configs keyed by (path, mtime), shared by every ConfigManager
+_config_cache = {}
+
+# config manager
+class ConfigManager:
+    def __init__(self, path=CONFIG):
+        self.path = path
+        self.config = self._load()
+
+    def _load(self):
+        try:
+            stamp = (self.path, os.stat(self.path).st_mtime_ns)
+        except OSError:
+            return {"template_path": "", "suffix_mappings": {}}
+        if stamp not in _config_cache:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                _config_cache[stamp] = json.load(f)
+        return copy.deepcopy(_config_cache[stamp])
+
+    def save(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.config, f, indent=4)
+        _config_cache.clear()
+
+    def get_suffix_map(self):
+        # Return only the suffix mappings dictionary
+        return self.config.get("suffix_mappings", {})
+
+    # relative template paths are relative to the config folder, same as
+    # the material suffix templates
+    def get_template_path(self):
+        path = self.config.get("template_path", "")
+        if path and not os.path.isabs(path):
+            return os.path.normpath(os.path.join(os.path.dirname(self.path), path))
+        return path
+
+    def set_template_path(self, path):
+        self.config["template_path"] = path
+
+    def add_suffix(self, key, suffix):
+        self.config.setdefault("suffix_mappings", {}).setdefault(key, [])
+        if suffix not in self.config["suffix_mappings"][key]:
+            self.config["suffix_mappings"][key].append(suffix)
+
+    def remove_suffix(self, key, suffix):
+        if key in self.config["suffix_mappings"]:
+            self.config["suffix_mappings"][key] = [s for s in self.config["suffix_mappings"][key] if s != suffix]
+    
+    def get_material_suffix(self):
+        return self.config.get('material_suffix_templates', {})
+
+    # grabs the correct template file for the material suffix
+    # templates are loaded in config\template
+    def grab_template_for_material(self, material_name):
+        suffix_map = self.get_material_suffix()
+        for suffix, r_path in suffix_map.items():
+            if material_name.lower().endswith(suffix.lower()):
+                abs_path = os.path.normpath(os.path.join(os.path.dirname(self.path), r_path)) 
+                
+                # OLD: this doesnt trigger? means its not file then but why?
+                # it was because this loads it in the config folder. my template folder was outside of the config
+                if os.path.isfile(abs_path):
+                    #print('Suffix Template Path : ' + abs_path)
+                    return abs_path
+                else:
+                    pass
+                    #print('failed os.path.isfile - ' + abs_path)
+        return self.get_template_path()
+
+# -------------------------------------------
+#               Function Logic
+# -------------------------------------------
+
+# validates the sfm material input
+# it check if a real path on system, if ends with materials, if folder one level up is named game
+def valid_materials_path(path):
+    path = os.path.normpath(path)
+    parent_folder = os.path.basename(os.path.dirname(path))
+    if not os.path.isdir(path) or os.path.basename(path).lower() != "materials" or parent_folder.lower() == "game":
+        return False
+    return True
+
+# regex tables are compiled on first use instead of at import
+_patterns = {}
+
+def _qc_patterns():
+    if not _patterns:
+        _patterns["cdmaterials"] = re.compile(r'\$cdmaterials\s+"([^"]+)"', re.IGNORECASE)
+        _patterns["smds"] = [
+            re.compile(r'\$model\s+\S+\s+"([\w\s\\.-]+\.smd)"', re.IGNORECASE),
+            re.compile(r'\$body\s+\S+\s+"([\w\s\\.-]+\.smd)"', re.IGNORECASE),
+            re.compile(r'studio\s+"([\w\s\\.-]+\.smd)"', re.IGNORECASE),
+        ]
+    return _patterns
+
+# $cdmaterials paths in the text of one qc
+def qc_cdmaterials(content):
+    return set(_qc_patterns()["cdmaterials"].findall(content))
+
+# smd paths in the text of one qc ($model, $body, $bodygroup studio),
+# resolved against the qc's folder
+def qc_smds(content, qc_dir):
+    smd_files = set()
+    for pattern in _qc_patterns()["smds"]:
+        for match in pattern.findall(content):
+            smd_files.add(os.path.normpath(os.path.join(qc_dir, match)))
+    return smd_files
+
+# scans qcs and grab the $cdmaterials path 
+def get_cdmaterials(path):
+    cdmaterials_list = set()
+    for root, dirs, files in os.walk(path):
+        for file in files:
+            if file.lower().endswith('.qc'):
+                abs_path = os.path.join(root, file)
+                with open(abs_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    cdmaterials_list.update(qc_cdmaterials(f.read()))
+    return cdmaterials_list
+
+def get_cdmaterials_multiple(paths):
+    cdmaterials = set()
+    for path in paths:
+        cdmaterials.update(get_cdmaterials(path))
+    return cdmaterials
+
+# scans qcs and extract smds used in qc. ($model, $body, $bodygroup studio)
+def get_smds(path):
+    smd_files = set()
+    for root, dirs, files in os.walk(path):
+        for file in files:
+            if file.lower().endswith('.qc'):
+                abs_path = os.path.join(root, file)
+                with open(abs_path, "r", encoding="utf-8", errors="ignore") as f:
+                    smd_files.update(qc_smds(f.read(), root))
+    return smd_files
+
+# scans vtfs, returns vtf name and vtf cdmat path 
+def collect_vtf(scan_path, materials_root):
+    vtf_files = []
+    for root, _, files in os.walk(scan_path):
+        for file in files:
+            if file.lower().endswith('.vtf'):
+                rm_ext = os.path.splitext(file)[0].lower()
+                full_path = os.path.join(root, file)
+                rel_path = os.path.relpath(full_path, materials_root)
+                vtf_files.append((rm_ext, rel_path.replace("\\", "/")))
+    return vtf_files
+
+# scans for parmaters in config. matches suffix to parameters and matches textures to materials
+def map_vtfs_to_keys_per_material(material_name, vtf_list, key_to_suffixes, cutoff=0.6):
+    import difflib
+    # Extract base names (e.g. ak4_sight_color -> ak4_sight)
+    vtf_basenames = list(set(name.rsplit('_', 1)[0] for name, _ in vtf_list if '_' in name))
+    matches = difflib.get_close_matches(material_name.lower(), vtf_basenames, n=1, cutoff=cutoff)
+    if not matches:
+        return {}
+    matched_prefix = matches[0]
+    filtered_vtfs = [(name, path) for name, path in vtf_list if name.startswith(matched_prefix)]
+    mapped = {}
+    for vtf_name, vtf_path in filtered_vtfs:
+        for key, suffixes in key_to_suffixes.items():
+            if any(vtf_name.endswith(suffix) for suffix in suffixes):
+                mapped[key] = vtf_path
+                break
+    return mapped
+
+# fills the %key% placeholders of a template with the matched textures and
+# strips the ones that had no match
+def render_vmt(template_lines, mapped_textures, key_to_suffixes):
+    vmt_output = []
+    for line in template_lines:
+        new_line = line
+        for vmt_key, vtf_path in mapped_textures.items():
+            rel_path = vtf_path.replace("\\", "/")
+            rel_path_no_ext = os.path.splitext(rel_path)[0]
+            placeholder = f"%{vmt_key.strip('$')}%"
+            new_line = new_line.replace(placeholder, rel_path_no_ext)
+
+        # Strip remaining placeholders
+        for key in key_to_suffixes.keys():
+            placeholder = f"%{key.strip('$')}%"
+            if placeholder in new_line:
+                new_line = new_line.replace(placeholder, '')
+
+        vmt_output.append(new_line)
+    return vmt_output
+
+# template lines keyed by (path, mtime), read once per run instead of once
+# per material
+_template_cache = {}
+
+def read_template(path):
+    stamp = (path, os.stat(path).st_mtime_ns)
+    if stamp not in _template_cache:
+        with open(path, 'r', errors='ignore') as f:
+            _template_cache[stamp] = f.readlines()
+    return _template_cache[stamp]
+
+# vtfs under one $cdmaterials folder, picked from a collect_vtf() list of
+# the whole materials root. same entries as collect_vtf on that folder
+def vtfs_in_folder(vtf_list, cdmaterials, materials_path):
+    folder = os.path.relpath(os.path.normpath(os.path.join(materials_path, cdmaterials)), materials_path)
+    if folder == '.':
+        return list(vtf_list)
+    prefix = folder.replace("\\", "/").lower() + '/'
+    return [(name, path) for name, path in vtf_list if path.lower().startswith(prefix)]
+
+# renders <materials>/<cdmaterials>/<material>.vmt without writing it.
+# returns (JobResult, vmt text), the text is None when it failed. vtf_list
+# is the collect_vtf() list of that folder, scanned here when not given
+def build_material_vmt(mat, cdmaterials, materials_path, config_manager, key_to_suffixes, vtf_list=None):
+    normalize_vmt_path = os.path.normpath(os.path.join(materials_path, cdmaterials))
+    write_vmt = os.path.join(normalize_vmt_path, f"{mat}.vmt")
+    result = JobResult('vmt', mat, output=write_vmt)
+
+    if vtf_list is None:
+        vtf_list = collect_vtf(normalize_vmt_path, materials_path)
+    mapped_textures = map_vtfs_to_keys_per_material(mat, vtf_list, key_to_suffixes)
+
+    # Select the right template for this material based on suffix
+    template_path = config_manager.grab_template_for_material(mat)
+    if not os.path.isfile(template_path):
+        result.status = FAILED
+        result.add_diagnostic(f"VMT template not found at {template_path} for material {mat}")
+        return result, None
+
+    vmt_content = read_template(template_path)
+
+    for key in key_to_suffixes:
+        if key not in mapped_textures:
+            result.add_diagnostic(f"No texture found for {key}")
+
+    return result, ''.join(render_vmt(vmt_content, mapped_textures, key_to_suffixes))
+
+def write_vmt_file(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8", errors='ignore') as f:
+        f.write(text)
+
+# writes <materials>/<cdmaterials>/<material>.vmt and returns a JobResult.
+# writer(path, text) replaces the write, e.g. to collect a dry run
+def write_material_vmt(mat, cdmaterials, materials_path, config_manager, key_to_suffixes, vtf_list=None, writer=None):
+    start = time.perf_counter()
+    result, text = build_material_vmt(mat, cdmaterials, materials_path, config_manager, key_to_suffixes, vtf_list)
+    if text is not None:
+        (writer or write_vmt_file)(result.output, text)
+    result.elapsed = time.perf_counter() - start
+    return result
+
+# yields a JobResult per vmt written, one for every smd material in every
+# $cdmaterials folder of the input qcs. unreadable smds come back as failed
+# results of kind 'smd'. writer is passed on to write_material_vmt
+def iter_generate_vmts(input_paths, materials_path, config_manager=None, progress=None, cancel=None, writer=None):
+    config_manager = config_manager or ConfigManager()
+    key_to_suffixes = config_manager.get_suffix_map()
+
+    smd_paths = set()
+    for path in input_paths:
+        smd_paths.update(get_smds(path))
+
+    # only the material names are needed, so skip the full SMDFile parse
+    smd_materials = set()
+    materials_by_smd, errors = read_materials_many(sorted(smd_paths))
+    for materials in materials_by_smd.values():
+        smd_materials.update(materials)
+    for smd_path, e in sorted(errors.items()):
+        result = JobResult('smd', smd_path, status=FAILED, diagnostics=[f"Could not read SMD: {e}"])
+        report(progress, result, 0)
+        yield result
+
+    cdmaterials = sorted(get_cdmaterials_multiple(input_paths))
+    # one walk of the materials root instead of one per material
+    all_vtfs = collect_vtf(materials_path, materials_path)
+    vtfs_by_folder = {path: vtfs_in_folder(all_vtfs, path, materials_path) for path in cdmaterials}
+    total = len(smd_materials) * len(cdmaterials)
+    done = 0
+    for mat in sorted(smd_materials):
+        for path in cdmaterials:
+            if is_cancelled(cancel):
+                return
+            done += 1
+            result = write_material_vmt(mat, path, materials_path, config_manager, key_to_suffixes,
+                                        vtfs_by_folder[path], writer)
+            report(progress, result, done, total)
+            yield result
+
+def print_vmt_result(result):
+    if result.kind == 'smd':
+        print(result.diagnostics[0] + f" ({result.input})")
+        return
+    print('Material : \n ' + result.input + '\n')
+    if result.ok:
+        print(f"Writing VMT: {result.output}")
+    else:
+        for line in result.diagnostics:
+            print(line)
+
+# file list interperter
+def parse_filelist(path):
+    input_paths = []
+    materials_path = None
+
+    if not os.path.isfile(path):
+        print(f"File list not found: {path}")
+        sys.exit(1)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            if '=' not in line:
+                print(f"Invalid line in file list: {line}")
+                continue
+
+            key, _, raw_value = line.partition('=')
+            key = key.strip().lower()
+            value = raw_value.strip().strip('"').strip("'")
+
+            if not value:
+                print(f"Empty path for {key} in file list.")
+                continue
+
+            if key == 'input':
+                input_paths.append(os.path.normpath(value))
+            elif key == 'materials':
+                if materials_path is not None:
+                    print("Error: Only one 'materials=' entry is allowed in the file list.")
+                    sys.exit(1)
+                materials_path = os.path.normpath(value)
+            else:
+                print(f"Unknown key in file list: {key}")
+
+    if materials_path is None:
+        print("Error: Missing 'materials=' entry in file list.")
+        sys.exit(1)
+
+    return input_paths, materials_path
+
+# -------------------------------------------------------------------------------------------
+
+# ---------------------------------------------
+#               Execution logic
+# ---------------------------------------------
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="SMD to VMT Generator CLI")
+    parser.add_argument('--input', '-i', action='append', help='Path to QC/SMD files (can be used multiple times)')
+    parser.add_argument('--materials', '-m', help='Path to SFM materials folder')
+    parser.add_argument('--filelist', '-l', help='Path to file list containing input/materials paths')
+    parser.add_argument('--config', '-c', action='store_true', help='Launch config editor')
+    parser.add_argument('--dryrun', '-dryrun', action='store_true', help='Generate VMTs in memory and report what would change without writing')
+    parser.add_argument('--validate', '-validate', action='store_true', help='Check generated and existing VMTs for empty, unresolved and missing texture parameters')
+    parser.add_argument('--diff', '-diff', action='store_true', help='Print a diff of every VMT the run changes')
+    parser.add_argument('--report', '-report', help='Write the changes and validation problems to this JSON file')
+    args = parser.parse_args(argv)
+
+    if args.config:
+        run_config_editor()
+        return
+
+    input_paths = args.input or []
+    materials_path = args.materials
+
+    if args.filelist:
+        file_inputs, file_materials = parse_filelist(args.filelist)
+        input_paths.extend(file_inputs)
+        materials_path = file_materials  # override
+
+    if not input_paths or not materials_path:
+        parser.error("You must provide at least one --input and one --materials path, or use --filelist")
+
+    if not valid_materials_path(materials_path):
+        print("Invalid materials path provided.")
+        sys.exit(1)
+
+    if not (args.dryrun or args.validate or args.diff or args.report):
+        for result in iter_generate_vmts(input_paths, materials_path):
+            print_vmt_result(result)
+        return
+
+    # render everything in memory first, check it against what's on disk,
+    # then only write what actually changes
+    config_manager = ConfigManager()
+    planned = {}
+    results = []
+    for result in iter_generate_vmts(input_paths, materials_path, config_manager, writer=planned.__setitem__):
+        results.append(result)
+        if not result.ok:
+            print_vmt_result(result)
+
+    texture_params = TEXTURE_PARAMS | {key.lower() for key in config_manager.get_suffix_map()}
+    check = validate_vmts(materials_path, planned, texture_params)
+    diff = check["diff"]
+    print(f"{len(planned)} VMTs generated: {len(diff['added'])} new, {len(diff['changed'])} changed, "
+          f"{len(diff['unchanged'])} unchanged")
+
+    if args.diff:
+        for path in diff["added"]:
+            print(f"+ {path}")
+        for path in diff["changed"]:
+            print("\n".join(unified_diff(path, check["old"][path], check["new"][path])))
+
+    if args.validate:
+        print(f"\nChecked {check['checked']} VMTs, {len(check['issues'])} with problems")
+        for path, issues in check["issues"].items():
+            print(path)
+            for issue in issues:
+                print(f"  {issue}")
+
+    if args.report:
+        data = {
+            "results": [result.to_dict() for result in results],
+            "diff": diff,
+            "checked": check["checked"],
+            "issues": check["issues"],
+        }
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4)
+        print(f"Report written to {args.report}")
+
+    if not args.dryrun:
+        for path in diff["added"] + diff["changed"]:
+            write_vmt_file(path, check["new"][path])
+        print(f"Wrote {len(diff['added']) + len(diff['changed'])} VMTs")
+
+    if args.validate and check["issues"]:
+        sys.exit(1)
+
+def run_config_editor():
+    manager = ConfigManager()
+
+    def show_menu():
+        print("\n--- CONFIG EDITOR ---")
+        print("1. View Config")
+        print("2. Set VMT Template Path")
+        print("3. Add Suffix to Key")
+        print("4. Remove Suffix from Key")
+        print("5. Save and Exit")
+
+    while True:
+        show_menu()
+        choice = input("Select an option: ").strip()
+        if choice == '1':
+            print(json.dumps(manager.config, indent=4))
+        elif choice == '2':
+            new_path = input("Enter new template path: ").strip()
+            manager.set_template_path(new_path)
+        elif choice == '3':
+            key = input("Enter VMT key (e.g. $basetexture): ").strip()
+            suffix = input("Enter suffix (e.g. _color): ").strip()
+            manager.add_suffix(key, suffix)
+        elif choice == '4':
+            key = input("Enter VMT key: ").strip()
+            suffix = input("Enter suffix to remove: ").strip()
+            manager.remove_suffix(key, suffix)
+        elif choice == '5':
+            manager.save()
+            print("Config saved.")
+            break
+        else:
+            print("Invalid option.")
+
+if __name__ == '__main__':
+    main()
+
+# ---------------------------------------------------------------------------------------------
\ No newline at end of file
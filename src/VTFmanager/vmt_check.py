@@ -0,0 +1,148 @@
+import os
+import re
+import sys
+
+try:
+    from ..lib.keyvalues import parse_keyvalues, KeyValuesError
+except ImportError:
+    # run as a script: sets the parent dir to the src folder
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from lib.keyvalues import parse_keyvalues, KeyValuesError
+
+# --------------------------------------------------------------------
+# VMT validation
+# --------------------------------------------------------------------
+#
+# checks existing and about-to-be-written VMTs in one pass. the materials
+# root is walked once into a set of VTF names, so every texture check is a
+# set lookup instead of an os.path.exists call per parameter.
+#
+# flags per VMT:
+#   - files that don't parse as KeyValues
+#   - parameters with an empty value (a template key nothing matched)
+#   - %placeholders% left over from a template
+#   - texture parameters pointing at a VTF that isn't there
+
+# vmt parameters whose value is a texture path relative to materials/
+TEXTURE_PARAMS = {
+    '$basetexture', '$basetexture2', '$bumpmap', '$bumpmap2', '$normalmap', '$detail',
+    '$envmap', '$envmapmask', '$phongexponenttexture', '$phongwarptexture', '$lightwarptexture',
+    '$selfillummask', '$blendmodulatetexture', '$ambientoccltexture', '$iris', '$corneatexture',
+}
+# $envmap values the engine resolves itself
+BUILTIN_TEXTURES = {'env_cubemap'}
+
+_PLACEHOLDER = re.compile(r'%\w+%')
+
+# materials are looked up the way the engine does: relative to materials/,
+# forward slashes, no extension, case-insensitive
+def material_name(path):
+    path = path.replace('\\', '/').strip('/')
+    if path.lower().endswith(('.vmt', '.vtf')):
+        path = path[:-4]
+    return path.lower()
+
+
+# one walk of the materials root
+class MaterialsScan:
+    def __init__(self, materials_root):
+        self.root = os.path.normpath(materials_root)
+        self.vtfs = set()
+        self.vmts = {}
+        for root, _, files in os.walk(self.root):
+            rel_root = os.path.relpath(root, self.root)
+            rel_root = '' if rel_root == '.' else rel_root + '/'
+            for file in files:
+                ext = file[-4:].lower()
+                if ext == '.vtf':
+                    self.vtfs.add(material_name(rel_root + file))
+                elif ext == '.vmt':
+                    self.vmts[os.path.join(root, file)] = material_name(rel_root + file)
+
+
+# {param: material name} for the texture parameters of parsed vmt params
+def vmt_textures(params, texture_params=TEXTURE_PARAMS):
+    textures = {}
+    for key, value in params.items():
+        if key in texture_params and isinstance(value, str) and value.strip() \
+                and value.lower() not in BUILTIN_TEXTURES and not _PLACEHOLDER.search(value):
+            textures[key] = material_name(value)
+    return textures
+
+
+# returns a list of problems with one vmt's text
+def check_vmt(text, vtfs, texture_params=TEXTURE_PARAMS):
+    try:
+        _, params = parse_keyvalues(text)
+    except KeyValuesError as e:
+        return [f"Parse error: {e}"]
+
+    issues = []
+    for key, value in params.items():
+        if isinstance(value, dict):
+            continue
+        if not value.strip():
+            issues.append(f"Empty {key}")
+        elif _PLACEHOLDER.search(value):
+            issues.append(f"Unresolved placeholder in {key}: {value}")
+    for key, texture in vmt_textures(params, texture_params).items():
+        if texture not in vtfs:
+            issues.append(f"Missing texture for {key}: {texture}")
+    return issues
+
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            return path, f.read().decode('utf-8', errors='ignore')
+    except OSError:
+        return path, None
+
+
+def read_many(paths):
+    return dict(map(_read, paths))
+
+
+# validates every vmt under the materials root plus the planned ones
+# ({path: text} a run is about to write, checked instead of what's on
+# disk) and sorts the planned ones into added/changed/unchanged.
+# paths come back normalised, "new" holds the planned texts under those paths.
+# returns {"checked": n, "issues": {path: [...]}, "diff": {...}, "old": {path: text}, "new": {path: text}}
+def validate_vmts(materials_root, planned=None, texture_params=TEXTURE_PARAMS, scan=None):
+    planned = {os.path.normpath(path): text for path, text in (planned or {}).items()}
+    scan = scan or MaterialsScan(materials_root)
+
+    existing = read_many(os.path.normpath(path) for path in scan.vmts)
+    diff = {"added": [], "changed": [], "unchanged": []}
+    old = {}
+    for path, text in planned.items():
+        current = existing.get(path)
+        if current is None:
+            diff["added"].append(path)
+        elif current.replace('\r\n', '\n') == text.replace('\r\n', '\n'):
+            diff["unchanged"].append(path)
+        else:
+            diff["changed"].append(path)
+            old[path] = current
+
+    issues = {}
+    checked = 0
+    for path, text in list(existing.items()) + [(p, t) for p, t in planned.items() if p not in existing]:
+        text = planned.get(path, text)
+        if text is None:
+            issues[path] = ["Could not read file"]
+            continue
+        checked += 1
+        found = check_vmt(text, scan.vtfs, texture_params)
+        if found:
+            issues[path] = found
+
+    for paths in diff.values():
+        paths.sort()
+    return {"checked": checked, "issues": dict(sorted(issues.items())), "diff": diff, "old": old, "new": planned}
+
+
+def unified_diff(path, old, new):
+    import difflib
+    return list(difflib.unified_diff(old.splitlines(), new.splitlines(), f"{path} (current)",
+                                     f"{path} (generated)", lineterm=''))
@@ -0,0 +1,222 @@
+import os
+import json
+import stat
+import shutil
+import hashlib
+import tempfile
+import threading
+
+try:
+    from ..lib.fileops import remove_file, replace_file
+except ImportError:
+    from lib.fileops import remove_file, replace_file
+
+# --------------------------------------------------------------------
+# Content-addressed VTF cache
+# --------------------------------------------------------------------
+#
+# layout of a cache dir (can live on a local disk or a shared drive):
+#
+#   <root>/objects/ab/ab12...ef.vtf   converted vtf, named by its key
+#   <root>/stats.json                 hit/miss counters over all runs
+#
+# the key is a sha256 over the source image bytes and the resolved rule
+# (format, alphaformat, extra_flags) plus the VTFCmd build, so changing
+# any of those produces a new entry instead of a stale hit.
+
+CACHE_VERSION = 1
+
+# cache objects are shared through hardlinks, so nothing may write to them
+# in place (VTFEdit saving over an output would change every linked copy)
+READ_ONLY = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+_WRITABLE = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+
+_CHUNK = 1024 * 1024
+_converter_digests = {}
+
+
+def hash_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# hashes the VTFCmd executable so a different converter build never reuses
+# old outputs. memoized on size + mtime since it runs once per texture
+def converter_version(vtfcmd_path):
+    try:
+        st = os.stat(vtfcmd_path)
+    except OSError:
+        return 'missing'
+    stamp = (os.path.abspath(vtfcmd_path), st.st_size, st.st_mtime_ns)
+    if stamp not in _converter_digests:
+        _converter_digests[stamp] = hash_file(vtfcmd_path)
+    return _converter_digests[stamp]
+
+
+def cache_key(file_path, rule, converter):
+    h = hashlib.sha256(hash_file(file_path).encode('ascii'))
+    params = {
+        "cache_version": CACHE_VERSION,
+        "converter": converter,
+        "format": rule.get('format'),
+        "alphaformat": rule.get('alphaformat'),
+        "extra_flags": list(rule.get('extra_flags') or []),
+    }
+    h.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+    return h.hexdigest()
+
+
+def link_or_copy(src, dest):
+    # link/copy next to dest, then swap it in, so an interrupted fetch never
+    # leaves a truncated vtf at dest
+    tmp = dest + '.tmp'
+    if os.path.exists(tmp):
+        remove_file(tmp)
+    try:
+        os.link(src, tmp)
+        how = 'link'
+    except OSError:
+        # different volume, network share or no hardlink support. a copy is
+        # its own file, so it can be writable again
+        shutil.copy2(src, tmp)
+        os.chmod(tmp, stat.S_IMODE(os.stat(tmp).st_mode) | stat.S_IWUSR)
+        how = 'copy'
+    replace_file(tmp, dest)
+    return how
+
+
+class VTFCache:
+    def __init__(self, root, max_bytes=0):
+        self.root = os.path.abspath(root)
+        self.objects = os.path.join(self.root, 'objects')
+        self.stats_path = os.path.join(self.root, 'stats.json')
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0, "bytes_saved": 0}
+        # parallel conversions share one cache
+        self._lock = threading.Lock()
+        os.makedirs(self.objects, exist_ok=True)
+
+    def key_for(self, file_path, rule, vtfcmd_path):
+        return cache_key(file_path, rule, converter_version(vtfcmd_path))
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def _object_path(self, key):
+        return os.path.join(self.objects, key[:2], key + '.vtf')
+
+    # copies/links a cached vtf to dest. returns False on a miss
+    def fetch(self, key, dest):
+        obj = self._object_path(key)
+        if not os.path.isfile(obj):
+            self._count("misses")
+            return False
+        # removing a linked output on windows clears the flag for every
+        # link, so it is set again when it's gone. only the owner may chmod
+        # or utime a shared object, for everyone else both are best-effort
+        try:
+            if os.stat(obj).st_mode & _WRITABLE:
+                os.chmod(obj, READ_ONLY)
+        except OSError:
+            pass
+        try:
+            link_or_copy(obj, dest)
+        except OSError:
+            self._count("misses")
+            return False
+        try:
+            # bump mtime so eviction keeps recently used entries
+            os.utime(obj)
+        except OSError:
+            pass
+        self._count("hits")
+        self._count("bytes_saved", os.path.getsize(obj))
+        return True
+
+    # adds a freshly converted vtf. written to a temp file first so other
+    # machines sharing the cache never see a half-written object
+    def store(self, key, src):
+        obj = self._object_path(key)
+        if os.path.isfile(obj):
+            return
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(obj), suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(src, tmp)
+            os.chmod(tmp, READ_ONLY)
+            os.replace(tmp, obj)
+        except OSError:
+            if os.path.exists(tmp):
+                remove_file(tmp)
+            raise
+        self._count("stored")
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.objects):
+            for file in files:
+                if not file.endswith('.vtf'):
+                    continue
+                path = os.path.join(root, file)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    # least recently used entries go first until the cache fits max_bytes
+    def evict(self, max_bytes=None):
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        if not limit:
+            return 0
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= limit:
+                break
+            try:
+                remove_file(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._count("evicted", removed)
+        return removed
+
+    def load_stats(self):
+        if not os.path.isfile(self.stats_path):
+            return {}
+        try:
+            with open(self.stats_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    # merges this run's counters into stats.json
+    def save_stats(self):
+        totals = self.load_stats()
+        for name, value in self.stats.items():
+            totals[name] = totals.get(name, 0) + value
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(totals, f, indent=4)
+        os.replace(tmp, self.stats_path)
+        return totals
+
+    def summary(self, stats=None):
+        stats = stats or self.stats
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        rate = (100.0 * stats.get("hits", 0) / lookups) if lookups else 0.0
+        return (f"{stats.get('hits', 0)} hits, {stats.get('misses', 0)} misses ({rate:.1f}% hit rate), "
+                f"{stats.get('stored', 0)} stored, {stats.get('evicted', 0)} evicted, "
+                f"{stats.get('bytes_saved', 0) / (1024 * 1024):.1f} MB reused")
@@ -0,0 +1,26 @@
+# --------------------------------------------------------------------
+# Library API
+# --------------------------------------------------------------------
+#
+# batch functions for driving LambdaConstruct from another program. each
+# iter_* function is a generator yielding a JobResult per item as it
+# finishes, takes a progress(result, done, total) callback and a
+# CancelToken, and never prints.
+#
+#   from lambdaconstruct.api import iter_convert_folder, CancelToken
+#   for result in iter_convert_folder("textures", "textures", vtfcmd, rules):
+#       print(result.input, result.status, result.elapsed)
+
+from .lib.jobs import JobResult, CancelToken, OK, CACHED, FAILED, CANCELLED
+from .compileQcs import compile_qc, iter_compile_qcs
+from .VTFmanager.MakeVTFbySuffix import convert_texture, iter_convert_folder, iter_convert_list, load_config
+from .VTFmanager.generate_vmt import iter_generate_vmts, write_material_vmt, ConfigManager
+from .depindex import DependencyIndex
+
+__all__ = [
+    "JobResult", "CancelToken", "OK", "CACHED", "FAILED", "CANCELLED",
+    "compile_qc", "iter_compile_qcs",
+    "convert_texture", "iter_convert_folder", "iter_convert_list", "load_config",
+    "iter_generate_vmts", "write_material_vmt", "ConfigManager",
+    "DependencyIndex",
+]
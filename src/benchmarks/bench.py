@@ -0,0 +1,338 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import contextlib
+import subprocess
+
+from . import synthetic
+from ..lib.SMDpraser import SMDFile
+from ..lib import smd_materials
+from .. import compileQcs
+from ..VTFmanager import MakeVTFbySuffix
+from ..VTFmanager import vtf_cache
+from ..VTFmanager import generate_vmt
+from ..VTFmanager import vmt_check
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# workload sizes. every number can be overridden on the command line
+SIZES = {
+    "small":  {"bones": 16,  "materials": 4,  "triangles": 5000,   "qcs": 10,  "textures": 40},
+    "medium": {"bones": 64,  "materials": 16, "triangles": 100000, "qcs": 50,  "textures": 200},
+    "large":  {"bones": 256, "materials": 64, "triangles": 1000000, "qcs": 100, "textures": 1000},
+}
+
+
+@contextlib.contextmanager
+def quiet():
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+# --------------------------------------------------------------------
+# Measurement
+# --------------------------------------------------------------------
+
+# runs fn `warmup` times untimed, then `repeat` times timed. the median and
+# the interquartile range are what comparisons use since they barely move
+# when one round gets hit by a background process
+def measure(fn, repeat=5, warmup=1, setup=None):
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    if len(ordered) >= 4:
+        q1, _, q3 = statistics.quantiles(ordered, n=4)
+    else:
+        q1, q3 = ordered[0], ordered[-1]
+    return {
+        "rounds": len(ordered),
+        "min": ordered[0],
+        "max": ordered[-1],
+        "mean": statistics.fmean(ordered),
+        "median": statistics.median(ordered),
+        "stdev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "iqr": q3 - q1,
+        "samples": samples,
+    }
+
+
+# --------------------------------------------------------------------
+# Workload + cases
+# --------------------------------------------------------------------
+
+class Workload:
+    def __init__(self, root, params, seed=0):
+        self.root = root
+        self.params = params
+
+        p = params
+        self.smd_path = os.path.join(root, 'parse', 'big.smd')
+        synthetic.write_smd(self.smd_path, bones=p["bones"], materials=p["materials"],
+                            triangles=p["triangles"], seed=seed)
+
+        self.qc_root = os.path.join(root, 'qc')
+        self.qc_layout = synthetic.write_qc_tree(self.qc_root, qcs=p["qcs"], seed=seed)
+
+        self.game_dir = os.path.join(root, 'usermod')
+        self.materials_root = os.path.join(self.game_dir, 'materials')
+        self.vtf_count = synthetic.write_vtf_tree(self.materials_root, self.qc_layout)
+
+        self.texture_dir = os.path.join(root, 'textures')
+        synthetic.write_texture_folder(self.texture_dir, count=p["textures"], seed=seed)
+
+        tools = os.path.join(root, 'bin')
+        self.studiomdl = synthetic.write_studiomdl_stub(tools)
+        self.vtfcmd = synthetic.write_vtfcmd_stub(tools)
+
+        self.scratch = os.path.join(root, 'scratch')
+        os.makedirs(self.scratch, exist_ok=True)
+
+    def describe(self):
+        return dict(self.params, smd_bytes=os.path.getsize(self.smd_path), vtfs=self.vtf_count)
+
+
+def build_cases(work):
+    key_to_suffixes = generate_vmt.ConfigManager().get_suffix_map()
+
+    all_materials = sorted({m for _, mats in work.qc_layout.values() for m in mats})
+    vtf_list = generate_vmt.collect_vtf(work.materials_root, work.materials_root)
+    rules = MakeVTFbySuffix.DEFAULT_CONFIG['rules']
+
+    def smd_parse():
+        SMDFile(work.smd_path)
+
+    def smd_materials_fast():
+        smd_materials.read_materials(work.smd_path)
+
+    qc_smds = sorted(generate_vmt.get_smds(work.qc_root))
+
+    def smd_materials_batch():
+        smd_materials.read_materials_many(qc_smds, workers=1)
+
+    def smd_materials_pool():
+        smd_materials.read_materials_many(qc_smds, workers=os.cpu_count() or 1)
+
+    def qc_scan():
+        generate_vmt.get_cdmaterials(work.qc_root)
+        generate_vmt.get_smds(work.qc_root)
+
+    def map_vtfs():
+        for material in all_materials:
+            generate_vmt.map_vtfs_to_keys_per_material(material, vtf_list, key_to_suffixes)
+
+    def vmt_generate():
+        with quiet():
+            generate_vmt.main(['-i', work.qc_root, '-m', work.materials_root])
+
+    def vmt_validate():
+        with quiet():
+            generate_vmt.main(['-i', work.qc_root, '-m', work.materials_root, '-dryrun', '-validate'])
+
+    def vmt_check_all():
+        vmt_check.validate_vmts(work.materials_root)
+
+    compile_logs = os.path.join(work.scratch, 'logs')
+    # keep run state out of the directory the benchmark is started from
+    compile_journal = os.path.join(work.scratch, 'compile_journal.jsonl')
+    compile_history = os.path.join(work.scratch, 'job_history.json')
+
+    def compile_qcs():
+        with quiet():
+            compileQcs.main(['-qcfolder', work.qc_root, '-game', work.game_dir,
+                             '-studiomdl', work.studiomdl, '-logdir', compile_logs,
+                             '-journal', compile_journal, '-history', compile_history])
+
+    vtf_out = os.path.join(work.scratch, 'vtf')
+    cache_dir = os.path.join(work.scratch, 'vtf_cache')
+
+    def reset_vtf_out():
+        shutil.rmtree(vtf_out, ignore_errors=True)
+
+    def convert():
+        with quiet():
+            MakeVTFbySuffix.batch_convert_folder(work.texture_dir, vtf_out, work.vtfcmd, rules)
+
+    def convert_cached():
+        cache = vtf_cache.VTFCache(cache_dir)
+        with quiet():
+            MakeVTFbySuffix.batch_convert_folder(work.texture_dir, vtf_out, work.vtfcmd, rules, cache)
+
+    cases = {
+        "smd_parse": (smd_parse, None),
+        # same file through the mmap fast path, compare with smd_parse
+        "smd_materials": (smd_materials_fast, None),
+        "smd_materials_batch": (smd_materials_batch, None),
+        "smd_materials_pool": (smd_materials_pool, None),
+        "qc_scan": (qc_scan, None),
+        "map_vtfs": (map_vtfs, None),
+        "vmt_generate": (vmt_generate, None),
+        # both need the vmts vmt_generate writes
+        "vmt_validate": (vmt_validate, None),
+        "vmt_check": (vmt_check_all, None),
+        "compile_qcs": (compile_qcs, None),
+        "convert_vtf": (convert, reset_vtf_out),
+        # warmup fills the cache, timed rounds are all hits
+        "convert_vtf_cached": (convert_cached, reset_vtf_out),
+    }
+    cases.update(startup_cases())
+    return cases
+
+
+# --------------------------------------------------------------------
+# Startup
+# --------------------------------------------------------------------
+
+# times fresh interpreter launches of the dispatcher CLI. these are what
+# wrapper scripts pay on every call, so they should stay in the tens of ms
+def startup_cases():
+    package = __package__.rsplit('.', 1)[0]
+    # `python -m src` only resolves from the repo root, an installed
+    # package resolves from anywhere
+    cwd = os.path.dirname(SRC_DIR) if package == 'src' else None
+
+    def launch(*args):
+        def run():
+            subprocess.run([sys.executable, '-m', package] + list(args), cwd=cwd, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return run
+
+    return {
+        "startup_cli": (launch('--help'), None),
+        "startup_compile": (launch('compile', '-h'), None),
+        "startup_vtf": (launch('vtf'), None),
+        "startup_vmt": (launch('vmt', '-h'), None),
+    }
+
+
+# --------------------------------------------------------------------
+# Baselines
+# --------------------------------------------------------------------
+
+def save_results(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=4)
+
+
+def load_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# returns [(name, baseline median, current median, ratio, regressed)]
+def compare(baseline, current, threshold=0.10):
+    rows = []
+    for name, stats in current["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base:
+            continue
+        ratio = stats["median"] / base["median"] if base["median"] else 0.0
+        # a change has to clear both the threshold and the noise seen in the baseline
+        noise = base.get("iqr", 0.0) / base["median"] if base["median"] else 0.0
+        regressed = ratio > 1.0 + max(threshold, noise)
+        rows.append((name, base["median"], stats["median"], ratio, regressed))
+    return rows
+
+
+def print_table(results):
+    print(f"\n{'benchmark':<22}{'median':>12}{'iqr':>12}{'min':>12}{'mean':>12}{'stdev':>12}")
+    for name, s in results["benchmarks"].items():
+        print(f"{name:<22}{s['median'] * 1000:>10.2f}ms{s['iqr'] * 1000:>10.2f}ms"
+              f"{s['min'] * 1000:>10.2f}ms{s['mean'] * 1000:>10.2f}ms{s['stdev'] * 1000:>10.2f}ms")
+
+
+# --------------------------------------------------------------------
+# CLI
+# --------------------------------------------------------------------
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Benchmark LambdaConstruct pipeline stages on synthetic assets")
+    parser.add_argument('-size', choices=sorted(SIZES), default='small', help="Workload preset")
+    parser.add_argument('-bones', type=int, help="Bones in the parse SMD")
+    parser.add_argument('-materials', type=int, help="Materials in the parse SMD")
+    parser.add_argument('-triangles', type=int, help="Triangles in the parse SMD")
+    parser.add_argument('-qcs', type=int, help="Number of QCs in the QC tree")
+    parser.add_argument('-textures', type=int, help="Number of images in the texture folder")
+    parser.add_argument('-repeat', type=int, default=5, help="Timed rounds per benchmark")
+    parser.add_argument('-warmup', type=int, default=1, help="Untimed rounds per benchmark")
+    parser.add_argument('-only', action='append', help="Run only this benchmark. Can be used multiple times.")
+    parser.add_argument('-seed', type=int, default=0, help="Seed for the synthetic generators")
+    parser.add_argument('-workdir', help="Folder for generated assets (default: a temp folder)")
+    parser.add_argument('-keep', action='store_true', help="Keep the generated assets")
+    parser.add_argument('-save', help="Write results to this JSON file")
+    parser.add_argument('-compare', help="Baseline JSON file to compare against")
+    parser.add_argument('-threshold', type=float, default=0.10, help="Allowed slowdown vs baseline median")
+    args = parser.parse_args(argv)
+
+    params = dict(SIZES[args.size])
+    for key in params:
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+
+    root = args.workdir or tempfile.mkdtemp(prefix='lambdaconstruct-bench-')
+    os.makedirs(root, exist_ok=True)
+
+    try:
+        print(f"Generating '{args.size}' workload in {root}")
+        start = time.perf_counter()
+        work = Workload(root, params, seed=args.seed)
+        print(f"Generated in {time.perf_counter() - start:.2f} seconds")
+
+        cases = build_cases(work)
+        selected = args.only or list(cases)
+        unknown = [name for name in selected if name not in cases]
+        if unknown:
+            parser.error(f"Unknown benchmark(s): {', '.join(unknown)}. Available: {', '.join(cases)}")
+
+        results = {
+            "created": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "workload": work.describe(),
+            "benchmarks": {},
+        }
+        for name in selected:
+            fn, setup = cases[name]
+            print(f"Running {name}...")
+            results["benchmarks"][name] = measure(fn, repeat=args.repeat, warmup=args.warmup, setup=setup)
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    print_table(results)
+
+    if args.save:
+        save_results(args.save, results)
+        print(f"\nResults saved to {args.save}")
+
+    if args.compare:
+        baseline = load_results(args.compare)
+        if baseline.get("workload") != results["workload"]:
+            print("\nWarning: baseline was recorded with a different workload")
+        rows = compare(baseline, results, args.threshold)
+        print(f"\n{'benchmark':<22}{'baseline':>12}{'current':>12}{'ratio':>9}")
+        for name, base, cur, ratio, regressed in rows:
+            flag = '  REGRESSION' if regressed else ''
+            print(f"{name:<22}{base * 1000:>10.2f}ms{cur * 1000:>10.2f}ms{ratio:>8.2f}x{flag}")
+        if any(row[4] for row in rows):
+            return 1
+    return 0
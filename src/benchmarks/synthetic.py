@@ -0,0 +1,189 @@
+import os
+import sys
+import random
+
+# --------------------------------------------------------------------
+# Synthetic asset generators
+# --------------------------------------------------------------------
+#
+# everything here is deterministic for a given seed so two runs of the
+# benchmark suite measure the exact same workload.
+
+TEXTURE_SUFFIXES = ['_color', '_normal', '_phongexp', '_alpha', '_albedo', '_bump', '_maskmap', '']
+TEXTURE_EXTENSIONS = ['.png', '.tga', '.jpg', '.bmp']
+VTF_SUFFIXES = ['_color', '_normal', '_phongexp']
+
+
+def _vertex(rng, bone_count):
+    return "{} {:.6f} {:.6f} {:.6f} {:.6f} {:.6f} {:.6f} {:.6f} {:.6f} 1 {} 1.000000".format(
+        rng.randrange(bone_count),
+        rng.uniform(-64, 64), rng.uniform(-64, 64), rng.uniform(0, 128),
+        rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 1),
+        rng.random(), rng.random(),
+        rng.randrange(bone_count),
+    )
+
+
+# writes an smd with `bones` nodes, `triangles` faces spread over `materials`
+# materials. returns the material names used
+def write_smd(path, bones=32, materials=4, triangles=1000, seed=0, material_prefix='mat'):
+    rng = random.Random(seed)
+    bones = max(1, bones)
+    material_names = [f"{material_prefix}_{i}" for i in range(max(1, materials))]
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write("version 1\nnodes\n")
+        for i in range(bones):
+            f.write(f'{i} "bone_{i}" {i - 1}\n')
+        f.write("end\nskeleton\ntime 0\n")
+        for i in range(bones):
+            f.write(f"{i} 0.000000 0.000000 1.000000 0.000000 0.000000 0.000000\n")
+        f.write("end\ntriangles\n")
+
+        # a small pool of vertex lines keeps generation fast for big files
+        # without changing what the parsers have to do per line
+        pool = [_vertex(rng, bones) for _ in range(256)]
+        batch = []
+        for i in range(triangles):
+            batch.append(material_names[i % len(material_names)])
+            batch.append(pool[(i * 3) & 255])
+            batch.append(pool[(i * 3 + 1) & 255])
+            batch.append(pool[(i * 3 + 2) & 255])
+            if len(batch) >= 40000:
+                f.write("\n".join(batch) + "\n")
+                batch = []
+        if batch:
+            f.write("\n".join(batch) + "\n")
+        f.write("end\n")
+    return material_names
+
+
+# writes a folder of qcs, one folder per model, each with $cdmaterials,
+# an $include of a shared qci and $body/$model/studio smd references.
+# returns {qc_path: (cdmaterials, [material names])}
+def write_qc_tree(root, qcs=20, smds_per_qc=3, materials_per_smd=3, triangles=200, bones=8, seed=0):
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, 'common.qci'), 'w', encoding='utf-8') as f:
+        f.write('$surfaceprop "metal"\n$scale 1.0\n')
+
+    layout = {}
+    for q in range(qcs):
+        name = f"model_{q}"
+        model_dir = os.path.join(root, name)
+        cdmaterials = f"models/synthetic/{name}/"
+        smd_names = []
+        materials = []
+        for s in range(smds_per_qc):
+            smd_name = f"{name}_part{s}.smd"
+            smd_names.append(smd_name)
+            materials += write_smd(os.path.join(model_dir, smd_name), bones=bones, materials=materials_per_smd,
+                                   triangles=triangles, seed=seed + q * 131 + s,
+                                   material_prefix=f"{name}_p{s}")
+
+        lines = [
+            f'$modelname "synthetic/{name}.mdl"',
+            f'$cdmaterials "{cdmaterials}"',
+            '$include "../common.qci"',
+        ]
+        for s, smd_name in enumerate(smd_names):
+            if s % 3 == 0:
+                lines.append(f'$body "part{s}" "{smd_name}"')
+            elif s % 3 == 1:
+                lines.append(f'$model "part{s}" "{smd_name}"')
+            else:
+                lines.append(f'$bodygroup "group{s}"\n{{\n    studio "{smd_name}"\n    blank\n}}')
+        lines.append(f'$sequence "idle" "{smd_names[0]}"')
+
+        qc_path = os.path.join(model_dir, f"{name}.qc")
+        with open(qc_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        layout[qc_path] = (cdmaterials, sorted(set(materials)))
+    return layout
+
+
+# writes `count` small image files with a mix of the suffixes the
+# converter and organizer rules look for
+def write_texture_folder(root, count=100, seed=0, size=4096):
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    paths = []
+    for i in range(count):
+        suffix = TEXTURE_SUFFIXES[i % len(TEXTURE_SUFFIXES)]
+        ext = TEXTURE_EXTENSIONS[i % len(TEXTURE_EXTENSIONS)]
+        path = os.path.join(root, f"tex_{i}{suffix}{ext}")
+        with open(path, 'wb') as f:
+            f.write(rng.randbytes(size))
+        paths.append(path)
+    # files that should be ignored by the converter
+    with open(os.path.join(root, 'readme.txt'), 'w') as f:
+        f.write('not a texture\n')
+    return paths
+
+
+# writes vtfs under materials_root for every material in the qc layout,
+# leaving a few materials without textures like a real project would
+def write_vtf_tree(materials_root, qc_layout, suffixes=VTF_SUFFIXES, missing_every=7):
+    count = 0
+    for cdmaterials, materials in qc_layout.values():
+        folder = os.path.join(materials_root, os.path.normpath(cdmaterials))
+        os.makedirs(folder, exist_ok=True)
+        for i, material in enumerate(materials):
+            if missing_every and i % missing_every == missing_every - 1:
+                continue
+            for suffix in suffixes:
+                with open(os.path.join(folder, f"{material.lower()}{suffix}.vtf"), 'wb') as f:
+                    f.write(b'VTF\0' + bytes(60))
+                count += 1
+    return count
+
+
+# --------------------------------------------------------------------
+# Stub executables
+# --------------------------------------------------------------------
+
+_STUDIOMDL_STUB = '''import sys
+qc = sys.argv[-1]
+for i in range({lines}):
+    print(f"Processing {{qc}} line {{i}}")
+print("Completed \\"" + qc + "\\"")
+'''
+
+_VTFCMD_STUB = '''import os, sys
+args = sys.argv
+src = args[args.index('-file') + 1]
+out = args[args.index('-output') + 1]
+name = os.path.splitext(os.path.basename(src))[0] + '.vtf'
+with open(src, 'rb') as f:
+    data = f.read()
+with open(os.path.join(out, name), 'wb') as f:
+    f.write(b'VTF\\0' + data)
+'''
+
+
+def _write_stub(folder, name, source):
+    os.makedirs(folder, exist_ok=True)
+    script = os.path.join(folder, name + '.py')
+    with open(script, 'w', encoding='utf-8') as f:
+        f.write(source)
+
+    if os.name == 'nt':
+        launcher = os.path.join(folder, name + '.cmd')
+        with open(launcher, 'w') as f:
+            f.write(f'@"{sys.executable}" "{script}" %*\n')
+    else:
+        launcher = os.path.join(folder, name)
+        with open(launcher, 'w') as f:
+            f.write(f'#!{sys.executable}\n' + source)
+        os.chmod(launcher, 0o755)
+    return launcher
+
+
+# fake studiomdl that prints `lines` lines of output and exits 0
+def write_studiomdl_stub(folder, lines=50):
+    return _write_stub(folder, 'studiomdl', _STUDIOMDL_STUB.format(lines=lines))
+
+
+# fake VTFCmd that writes <name>.vtf next to where VTFCmd would
+def write_vtfcmd_stub(folder):
+    return _write_stub(folder, 'VTFCmd', _VTFCMD_STUB)
@@ -0,0 +1,56 @@
+import sys
+import importlib
+
+# --------------------------------------------------------------------
+# Dispatcher CLI
+# --------------------------------------------------------------------
+#
+# only the module of the chosen subcommand gets imported, so
+# `lambdaconstruct vtf ...` never pays for the vmt generator or the
+# benchmark suite. keep this file free of heavy imports.
+
+COMMANDS = {
+    "compile": ("compileQcs", "Compile .qc files with studiomdl"),
+    "vtf": ("VTFmanager.MakeVTFbySuffix", "Convert textures to VTF using suffix rules"),
+    "vmt": ("VTFmanager.generate_vmt", "Generate VMTs for the materials used by QC/SMD files"),
+    "index": ("depindex", "Find what depends on a texture, material, SMD or QC"),
+    "bench": ("benchmarks.bench", "Benchmark the pipeline on synthetic assets"),
+}
+
+PROG = "lambdaconstruct"
+
+
+def print_usage():
+    print(f"usage: {PROG} <command> [options]\n")
+    print("commands:")
+    for name, (_, help_text) in COMMANDS.items():
+        print(f"  {name:<10}{help_text}")
+    print(f"\nrun '{PROG} <command> -h' for the options of a command")
+
+
+def load_command(name):
+    module_name = COMMANDS[name][0]
+    if __package__:
+        return importlib.import_module(f"{__package__}.{module_name}")
+    # run as a script from the src folder
+    return importlib.import_module(module_name)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    if not argv or argv[0] in ('-h', '--help'):
+        print_usage()
+        return 0
+
+    name = argv[0]
+    if name not in COMMANDS:
+        print(f"Unknown command: {name}\n")
+        print_usage()
+        return 2
+
+    return load_command(name).main(argv[1:], prog=f"{PROG} {name}") or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
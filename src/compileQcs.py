@@ -1,8 +1,30 @@
-import subprocess
 import os
 import sys
 import argparse
 import time
+import hashlib
+
+import re
+
+try:
+    from .lib.jobs import (JobResult, CancelToken, FAILED, CANCELLED, SKIPPED, is_cancelled, report, parse_jobs,
+                          stop_process, watch_cancel)
+    from .lib.checkpoint import Journal, fingerprint
+except ImportError:
+    from lib.jobs import (JobResult, CancelToken, FAILED, CANCELLED, SKIPPED, is_cancelled, report, parse_jobs,
+                         stop_process, watch_cancel)
+    from lib.checkpoint import Journal, fingerprint
+
+DEFAULT_JOURNAL = "compile_journal.jsonl"
+DEFAULT_HISTORY = "job_history.json"
+
+# the scheduler pulls in threading/queue, only load it for parallel runs
+def _scheduler():
+    try:
+        from .lib import scheduler
+    except ImportError:
+        from lib import scheduler
+    return scheduler
 
 def parse_compilefile(path):
 
@@ -33,7 +55,10 @@ def parse_compilefile(path):
 
     return config
 
-def run_studiomdl(studiomdl, game, qc_file, log_dir, enable_logging=True):
+# studiomdl output lines worth surfacing in a result
+DIAGNOSTIC_PREFIXES = ('ERROR', 'WARNING', 'BAD ')
+
+def check_paths(studiomdl, game, qc_file):
     if not os.path.isfile(studiomdl):
         raise FileNotFoundError(f"studiomdl.exe not found at: {studiomdl}")
     if not os.path.isdir(game):
@@ -41,6 +66,48 @@ def run_studiomdl(studiomdl, game, qc_file, log_dir, enable_logging=True):
     if not os.path.isfile(qc_file):
         raise FileNotFoundError(f"QC file not found: {qc_file}")
 
+# qcs in different folders often share a name (model.qc), and parallel
+# compiles must not share a log, so the name gets a short hash of the path
+def compile_log_path(qc_file, log_dir):
+    qc_name = os.path.splitext(os.path.basename(qc_file))[0]
+    path_hash = hashlib.sha1(os.path.normcase(os.path.abspath(qc_file)).encode('utf-8')).hexdigest()[:8]
+    return os.path.join(log_dir, f"{qc_name}_{path_hash}_compile.log")
+
+# files a qc pulls in ($include, smds, dmxs, vtas...). they go into the
+# resume fingerprint so editing an smd recompiles the qc
+QC_REFERENCE_PATTERN = r'"([^"]+\.(?:qci|qc|smd|dmx|vta|vrd))"'
+
+def qc_references(qc_file):
+    try:
+        with open(qc_file, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+    except OSError:
+        return []
+    qc_dir = os.path.dirname(qc_file)
+    return [os.path.normpath(os.path.join(qc_dir, ref))
+            for ref in sorted(set(re.findall(QC_REFERENCE_PATTERN, content, re.IGNORECASE)))]
+
+def qc_fingerprint(qc_file, studiomdl, game):
+    return fingerprint([qc_file] + qc_references(qc_file), {"studiomdl": studiomdl, "game": game})
+
+# bytes studiomdl has to read for a qc, used to estimate the job's cost
+def qc_input_size(qc_file):
+    size = 0
+    for path in [qc_file] + qc_references(qc_file):
+        try:
+            size += os.path.getsize(path)
+        except OSError:
+            pass
+    return size
+
+# compiles one qc and returns a JobResult. on_line gets every output line
+# as it arrives. a cancelled token or Ctrl-C stops studiomdl mid-compile,
+# also while it prints nothing.
+# the log is written to a .partial file and only renamed once the compile
+# finishes, so an interrupted run never leaves a half-written log behind
+def compile_qc(studiomdl, game, qc_file, log_dir, enable_logging=True, on_line=None, cancel=None):
+    check_paths(studiomdl, game, qc_file)
+
     command = [
         studiomdl,
         "-game", game,
@@ -49,35 +116,130 @@ def run_studiomdl(studiomdl, game, qc_file, log_dir, enable_logging=True):
         qc_file
     ]
 
-    qc_name = os.path.splitext(os.path.basename(qc_file))[0]
-    log_file_path = os.path.join(log_dir, f"{qc_name}_compile.log") if enable_logging else None
+    log_file_path = compile_log_path(qc_file, log_dir) if enable_logging else None
+    result = JobResult('compile', qc_file, output=log_file_path)
+    start = time.perf_counter()
+
+    # subprocess adds a few ms to every launch (startup_compile), so it
+    # loads on the first compile
+    import subprocess
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    watcher = watch_cancel(process, cancel)
+
+    partial_log_path = log_file_path + '.partial' if enable_logging else None
+    log_file = open(partial_log_path, 'w', encoding='utf-8') if enable_logging else None
+    finished = False
+
+    try:
+        for line in process.stdout:
+            if on_line:
+                on_line(line)
+            if log_file:
+                log_file.write(line)
+            if line.lstrip().upper().startswith(DIAGNOSTIC_PREFIXES):
+                result.add_diagnostic(line.rstrip())
+        process.wait()
+        # a compile that exited on its own keeps its result even if the
+        # token was set meanwhile
+        finished = not (watcher["stopped"] and process.returncode != 0)
+    finally:
+        stop_process(process)
+        process.stdout.close()
+        if log_file:
+            log_file.close()
+            if finished:
+                os.replace(partial_log_path, log_file_path)
+            else:
+                os.remove(partial_log_path)
+
+    result.elapsed = time.perf_counter() - start
+    result.returncode = process.returncode
+    if not finished:
+        result.status = CANCELLED
+        result.output = None
+    elif process.returncode != 0:
+        result.status = FAILED
+    return result
 
+def run_studiomdl(studiomdl, game, qc_file, log_dir, enable_logging=True):
     print(f"\nCompiling: {qc_file}")
     if enable_logging:
-        print(f"Logging to: {log_file_path}\n")
+        print(f"Logging to: {compile_log_path(qc_file, log_dir)}\n")
     else:
         print("Logging disabled\n")
 
-    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-
-    log_file = open(log_file_path, 'w', encoding='utf-8') if enable_logging else None
-
-    for line in process.stdout:
-        print(line, end='')
-        if log_file:
-            log_file.write(line)
+    result = compile_qc(studiomdl, game, qc_file, log_dir, enable_logging,
+                        on_line=lambda line: print(line, end=''))
 
-    process.wait()
-
-    if log_file:
-        log_file.close()
-
-    if process.returncode == 0:
+    if result.ok:
         print(f"\nCompile succeeded: {qc_file}\n")
     else:
-        print(f"\nCompile failed: {qc_file} (exit code {process.returncode})\n")
-def main():
-    parser = argparse.ArgumentParser(description="Compile Source Engine .qc files using studiomdl.exe")
+        print(f"\nCompile failed: {qc_file} (exit code {result.returncode})\n")
+    return result.ok
+
+# yields a JobResult per qc as each compile finishes. missing files come
+# back as failed results instead of raising so one bad entry doesn't end the batch.
+# with a journal, qcs that already compiled with unchanged inputs are skipped
+# and every finished compile is checkpointed. with an AdaptiveScheduler the
+# compiles run in parallel and results come in completion order
+def iter_compile_qcs(studiomdl, game, qc_files, log_dir, enable_logging=True,
+                     progress=None, cancel=None, on_line=None, journal=None, scheduler=None):
+    qc_files = list(qc_files)
+    if enable_logging:
+        os.makedirs(log_dir, exist_ok=True)
+
+    def compile_one(qc_file, job_fingerprint):
+        try:
+            result = compile_qc(studiomdl, game, qc_file, log_dir, enable_logging,
+                                on_line=on_line, cancel=cancel)
+        except FileNotFoundError as e:
+            result = JobResult('compile', qc_file, status=FAILED, diagnostics=[str(e)])
+        if journal and result.status != CANCELLED:
+            journal.record(qc_file, job_fingerprint, result.status, result.elapsed)
+        return result
+
+    done = 0
+    jobs = []
+    for qc_file in qc_files:
+        if is_cancelled(cancel):
+            return
+        job_fingerprint = qc_fingerprint(qc_file, studiomdl, game) if journal else None
+        if journal and journal.is_done(qc_file, job_fingerprint):
+            result = JobResult('compile', qc_file, status=SKIPPED)
+        elif scheduler:
+            jobs.append(scheduler.Job(qc_file, lambda qc=qc_file, fp=job_fingerprint: compile_one(qc, fp),
+                                  kind='compile', size=qc_input_size(qc_file)))
+            continue
+        else:
+            result = compile_one(qc_file, job_fingerprint)
+        done += 1
+        report(progress, result, done, len(qc_files))
+        yield result
+
+    if jobs:
+        for job, result in scheduler.run(jobs, cancel=cancel):
+            if isinstance(result, Exception):
+                result = JobResult('compile', job.key, status=FAILED, diagnostics=[str(result)])
+            done += 1
+            report(progress, result, done, len(qc_files))
+            yield result
+
+def print_compile_result(result):
+    if result.status == SKIPPED:
+        print(f"Skipping (already compiled): {result.input}")
+    elif result.ok:
+        print(f"Compile succeeded: {result.input} ({result.elapsed:.2f} seconds)")
+    elif result.status == CANCELLED:
+        print(f"Compile cancelled: {result.input}")
+    else:
+        print(f"Compile failed: {result.input} (exit code {result.returncode})")
+        for line in result.diagnostics[:10]:
+            print(f"    {line}")
+        if result.output:
+            print(f"    see {result.output}")
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Compile Source Engine .qc files using studiomdl.exe")
     parser.add_argument("-compile", help="Path to compile.txt config file")
     parser.add_argument("-qc", action='append', help="Path to .qc file(s). Can be used multiple times.")
     parser.add_argument("-game", help="Path to game folder (must contain gameinfo.txt)")
@@ -86,8 +248,13 @@ def main():
     parser.add_argument("-nolog", action="store_true", help="Disable log file output")
     parser.add_argument("-qcfolder", help="Folder path to scan recursively for .qc files to batch compile")
     parser.add_argument("-clearlogs", action="store_true", help="Delete all files in the log folder before compiling")
+    parser.add_argument("-resume", "--resume", action="store_true", help="Skip QCs that already compiled in the last run with unchanged inputs")
+    parser.add_argument("-journal", default=DEFAULT_JOURNAL, help=f"Checkpoint journal used by -resume (default: {DEFAULT_JOURNAL})")
+    parser.add_argument("-jobs", type=parse_jobs, default=1, help="Max parallel compiles, or 'auto' for one per CPU. Scaled down under CPU, memory or disk pressure (default: 1)")
+    parser.add_argument("-history", default=DEFAULT_HISTORY, help=f"Past job timings used to schedule parallel compiles (default: {DEFAULT_HISTORY})")
+    parser.add_argument("-report", help="Write a JSON run report with every result and the scheduler's decisions")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     config = {
         "qc": [],
@@ -148,24 +315,39 @@ def main():
                     except Exception as e:
                         print(f"Failed to delete {file_path}: {e}")
 
-    total_start = time.time()
-
-    for qc_path in config["qc"]:
-        try:
-            print(f"Starting compile: {qc_path}")
-            start = time.time()
+    journal = Journal(args.journal, resume=args.resume)
+    results = []
+    scheduler = None
 
-            run_studiomdl(config["studiomdl"], config["game"], qc_path, args.logdir, enable_logging=not args.nolog)
+    total_start = time.time()
 
-            end = time.time()
-            elapsed = end - start
-            print(f"Compile time for '{qc_path}': {elapsed:.2f} seconds\n")
-        except FileNotFoundError as e:
-            print(e)
+    try:
+        if args.jobs > 1:
+            # output of parallel compiles would interleave, it only goes to the logs
+            scheduler = _scheduler().AdaptiveScheduler(max_jobs=args.jobs,
+                                                       cost_model=_scheduler().CostModel(args.history))
+            print(f"Compiling {len(config['qc'])} QC files with up to {args.jobs} parallel jobs\n")
+            on_line = None
+        else:
+            on_line = lambda line: print(line, end='')
+        for result in iter_compile_qcs(config["studiomdl"], config["game"], config["qc"], args.logdir,
+                                       enable_logging=not args.nolog, cancel=CancelToken(), on_line=on_line,
+                                       journal=journal, scheduler=scheduler):
+            print_compile_result(result)
+            results.append(result)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted. Finished compiles are saved in {args.journal}, run again with -resume to continue.")
+        sys.exit(130)
 
     total_end = time.time()
     total_elapsed = total_end - total_start
     print(f"Total compile time: {total_elapsed:.2f} seconds")
 
+    if scheduler:
+        _scheduler().print_report(scheduler.report())
+    if args.report:
+        _scheduler().write_run_report(args.report, results, scheduler)
+        print(f"Run report written to {args.report}")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,510 @@
+import os
+import sys
+import json
+import re
+import argparse
+
+try:
+    from .lib.smd_materials import read_materials_many
+    from .lib.keyvalues import parse_keyvalues
+    from .VTFmanager.generate_vmt import qc_cdmaterials, qc_smds
+    from .VTFmanager.vmt_check import material_name, vmt_textures
+except ImportError:
+    from lib.smd_materials import read_materials_many
+    from lib.keyvalues import parse_keyvalues
+    from VTFmanager.generate_vmt import qc_cdmaterials, qc_smds
+    from VTFmanager.vmt_check import material_name, vmt_textures
+
+# --------------------------------------------------------------------
+# Reverse dependency index
+# --------------------------------------------------------------------
+#
+# links every asset to what is built from it:
+#
+#   vtf -> vmts that use it as a texture
+#   vmt -> smds whose triangles use the material (through the qc's $cdmaterials)
+#   smd / qci -> qcs that include them
+#   qc -> compiled outputs under <game>/models ($modelname)
+#
+# the json file only stores what each file references plus its size and
+# mtime. an update re-reads only files whose size/mtime changed, then the
+# reverse maps are rebuilt in memory, so dependents() is a dict lookup.
+# every run saves what it parsed. the kind/size/mtime of each file at the
+# last -changed run are kept apart as the baseline -changed compares to.
+
+DEFAULT_INDEX = "dep_index.json"
+INDEX_VERSION = 1
+
+# files studiomdl writes for a $modelname
+MODEL_OUTPUT_EXTENSIONS = ('.mdl', '.vvd', '.dx90.vtx', '.phy')
+
+_QC_INCLUDE = re.compile(r'\$include\s+"([^"]+)"', re.IGNORECASE)
+_QC_MODELNAME = re.compile(r'\$modelname\s+"([^"]+)"', re.IGNORECASE)
+
+
+def norm(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _read_text(path):
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read()
+
+
+# one qc plus its $include'd qcis. cdmaterials/smds/modelname can sit in
+# either, so they're read together
+def parse_qc(qc_path):
+    qc_dir = os.path.dirname(qc_path)
+    includes = []
+    cdmaterials = set()
+    smds = set()
+    modelname = None
+    queue = [qc_path]
+    seen = set()
+    while queue:
+        path = queue.pop(0)
+        if norm(path) in seen:
+            continue
+        seen.add(norm(path))
+        # missing includes are kept too, so the qc is re-read once they appear
+        if path != qc_path:
+            includes.append(norm(path))
+        try:
+            content = _read_text(path)
+        except OSError:
+            continue
+        cdmaterials.update(qc_cdmaterials(content))
+        smds.update(norm(smd) for smd in qc_smds(content, qc_dir))
+        match = _QC_MODELNAME.search(content)
+        if match and modelname is None:
+            modelname = match.group(1)
+        queue.extend(os.path.normpath(os.path.join(qc_dir, inc)) for inc in _QC_INCLUDE.findall(content))
+    return {
+        "includes": sorted(includes),
+        "cdmaterials": sorted(material_name(cd) for cd in cdmaterials),
+        "smds": sorted(smds),
+        "modelname": modelname,
+    }
+
+
+# {param: material name} for the texture parameters of a vmt. a vmt that
+# doesn't parse references nothing, vmt_check reports it
+def parse_vmt(vmt_path):
+    try:
+        _, params = parse_keyvalues(_read_text(vmt_path))
+    except ValueError:
+        return {"textures": {}}
+    return {"textures": vmt_textures(params)}
+
+
+# outputs studiomdl writes for a $modelname, under <game>/models
+def model_outputs(modelname, game):
+    base = os.path.splitext(modelname.replace('\\', '/'))[0]
+    root = os.path.join(game, 'models') if game else 'models'
+    return [norm(os.path.join(root, base + ext)) for ext in MODEL_OUTPUT_EXTENSIONS]
+
+
+class DependencyIndex:
+    def __init__(self, path=DEFAULT_INDEX):
+        self.path = path
+        self.inputs = []
+        self.materials_root = None
+        self.game = None
+        self.files = {}
+        self.baseline = None
+        self.dependents_map = {}
+        self.vtfs = {}
+        self.vmts = {}
+        self.outputs = set()
+        self.missing_textures = []
+        self.missing_materials = []
+        self.missing_files = []
+        if path and os.path.isfile(path):
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        self.inputs = data.get("inputs", [])
+        self.materials_root = data.get("materials_root")
+        self.game = data.get("game")
+        self.files = data.get("files", {})
+        # indexes saved before the baseline was split off were the baseline
+        self.baseline = data.get("baseline", self._stamps())
+        self._link()
+
+    def save(self):
+        data = {
+            "version": INDEX_VERSION,
+            "inputs": self.inputs,
+            "materials_root": self.materials_root,
+            "game": self.game,
+            "files": self.files,
+            "baseline": self.baseline,
+        }
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, self.path)
+
+    # ----------------------------------------------------------------
+    # scanning
+    # ----------------------------------------------------------------
+
+    # one walk over the qc inputs and the materials root. returns {path: kind}
+    def _discover(self):
+        found = {}
+        for path in self.inputs:
+            if os.path.isfile(path):
+                found[norm(path)] = 'qc'
+                continue
+            for root, _, files in os.walk(path):
+                for file in files:
+                    if file.lower().endswith('.qc'):
+                        found[norm(os.path.join(root, file))] = 'qc'
+        if self.materials_root:
+            for root, _, files in os.walk(self.materials_root):
+                for file in files:
+                    ext = file[-4:].lower()
+                    if ext in ('.vmt', '.vtf'):
+                        found[norm(os.path.join(root, file))] = ext[1:]
+        return found
+
+    # re-reads only new or changed files and drops deleted ones. returns
+    # {"added": [...], "changed": [...], "removed": [...]} by path
+    def update(self, inputs=None, materials_root=None, game=None):
+        if inputs is not None:
+            self.inputs = [os.path.abspath(path) for path in inputs]
+        if materials_root is not None:
+            self.materials_root = os.path.abspath(materials_root)
+        if game is not None:
+            self.game = os.path.abspath(game)
+
+        old = self.files
+        new = {}
+        changes = {"added": [], "changed": [], "removed": []}
+        changed = set()
+
+        def track(path, kind):
+            if path in new:
+                return None
+            stamp = _stat(path)
+            if stamp is None:
+                return None
+            record = old.get(path)
+            if record and record["kind"] == kind and (record["size"], record["mtime_ns"]) == stamp:
+                new[path] = record
+                return None
+            changes["changed" if record else "added"].append(path)
+            changed.add(path)
+            new[path] = {"kind": kind, "size": stamp[0], "mtime_ns": stamp[1]}
+            return new[path]
+
+        stale_smds = []
+        for path, kind in self._discover().items():
+            record = track(path, kind)
+            if record is None:
+                continue
+            try:
+                if kind == 'qc':
+                    record.update(parse_qc(path))
+                elif kind == 'vmt':
+                    record.update(parse_vmt(path))
+            except OSError:
+                pass
+
+        # qcis and smds are found through the qcs. a qc that didn't change
+        # can still point at an smd that did, or include a qci that did. the
+        # qc record holds what its qcis declare, so it is re-read then
+        for path, record in list(new.items()):
+            if record["kind"] != 'qc':
+                continue
+            includes = record.get("includes", [])
+            for include in includes:
+                track(include, 'qci')
+            if any(include in changed or (include in old and include not in new) for include in includes) \
+                    and path not in changed:
+                try:
+                    record = new[path] = dict(record, **parse_qc(path))
+                except OSError:
+                    pass
+                for include in record.get("includes", []):
+                    track(include, 'qci')
+            for smd in record.get("smds", []):
+                if smd not in new and track(smd, 'smd') is not None:
+                    stale_smds.append(smd)
+
+        materials_by_smd, errors = read_materials_many(stale_smds)
+        for smd, materials in materials_by_smd.items():
+            new[smd]["materials"] = sorted(materials)
+        for smd in errors:
+            new[smd]["materials"] = []
+
+        changes["removed"] = sorted(path for path in old if path not in new)
+        changes["added"].sort()
+        changes["changed"].sort()
+        self.files = new
+        self._link()
+        return changes
+
+    def _stamps(self):
+        return {path: [record["kind"], record["size"], record["mtime_ns"]] for path, record in self.files.items()}
+
+    # what changed since mark_baseline(), in the same shape update() returns
+    def baseline_changes(self):
+        baseline = self.baseline or {}
+        current = self._stamps()
+        return {
+            "added": sorted(path for path in current if path not in baseline),
+            "changed": sorted(path for path, stamp in current.items() if path in baseline and baseline[path] != stamp),
+            "removed": sorted(path for path in baseline if path not in current),
+        }
+
+    def mark_baseline(self):
+        self.baseline = self._stamps()
+
+    # ----------------------------------------------------------------
+    # reverse maps
+    # ----------------------------------------------------------------
+
+    def _add(self, source, dependent):
+        self.dependents_map.setdefault(source, set()).add(dependent)
+
+    def _link(self):
+        self.dependents_map = {}
+        self.missing_textures = []
+        self.missing_materials = []
+        self.missing_files = []
+        self.vtfs = {}
+        self.vmts = {}
+        self.outputs = set()
+
+        root = self.materials_root
+        for path, record in self.files.items():
+            if record["kind"] in ('vtf', 'vmt') and root:
+                name = material_name(os.path.relpath(path, root))
+                (self.vtfs if record["kind"] == 'vtf' else self.vmts)[name] = path
+
+        for path, record in self.files.items():
+            kind = record["kind"]
+            if kind == 'vmt':
+                for key, texture in record.get("textures", {}).items():
+                    vtf = self.vtfs.get(texture)
+                    if vtf:
+                        self._add(vtf, path)
+                    else:
+                        self.missing_textures.append((path, key, texture))
+                        # so adding or deleting the texture still reaches the vmt
+                        if root:
+                            self._add(norm(os.path.join(root, texture + '.vtf')), path)
+            elif kind == 'qc':
+                for include in record.get("includes", []):
+                    self._add(include, path)
+                for output in model_outputs(record["modelname"], self.game) if record.get("modelname") else []:
+                    self._add(path, output)
+                    self.outputs.add(output)
+                for smd in record.get("smds", []):
+                    self._add(smd, path)
+                    smd_record = self.files.get(smd)
+                    if smd_record is None:
+                        self.missing_files.append((path, smd))
+                        continue
+                    # the engine takes the first $cdmaterials folder that has the vmt
+                    for material in smd_record.get("materials", []):
+                        candidates = [material_name(f"{cd}/{material}") for cd in record.get("cdmaterials", [])]
+                        vmt = next((self.vmts[c] for c in candidates if c in self.vmts), None)
+                        if vmt:
+                            self._add(vmt, smd)
+                        else:
+                            self.missing_materials.append((path, smd, material))
+                            if candidates and root:
+                                self._add(norm(os.path.join(root, candidates[0] + '.vmt')), smd)
+
+        self.missing_textures.sort()
+        self.missing_materials.sort()
+        self.missing_files.sort()
+
+    # ----------------------------------------------------------------
+    # queries
+    # ----------------------------------------------------------------
+
+    # kind of an indexed path. outputs and missing files aren't in
+    # self.files, the extension tells what they were
+    def kind(self, path):
+        record = self.files.get(path)
+        if record:
+            return record["kind"]
+        if path in self.outputs:
+            return 'output'
+        ext = os.path.splitext(path)[1].lower().lstrip('.')
+        return ext if ext in ('vtf', 'vmt', 'smd', 'qci', 'qc') else 'output'
+
+    # files built directly from path
+    def dependents(self, path):
+        return set(self.dependents_map.get(norm(path), ()))
+
+    # everything built from any of paths, directly or not, grouped by kind:
+    # {"vmt": [...], "smd": [...], "qc": [...], "output": [...]}
+    def impact(self, paths):
+        seen = set()
+        stack = [norm(path) for path in paths]
+        while stack:
+            for dependent in self.dependents_map.get(stack.pop(), ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    stack.append(dependent)
+        grouped = {"vmt": [], "smd": [], "qci": [], "qc": [], "output": []}
+        for path in seen:
+            grouped.setdefault(self.kind(path), []).append(path)
+        for paths in grouped.values():
+            paths.sort()
+        return grouped
+
+    # vtfs no vmt uses, and vmts no indexed model uses
+    def orphans(self):
+        return {
+            "vtf": sorted(path for path in self.vtfs.values() if path not in self.dependents_map),
+            "vmt": sorted(path for path in self.vmts.values() if path not in self.dependents_map),
+        }
+
+    def missing(self):
+        return {
+            "textures": [{"vmt": vmt, "param": key, "texture": texture} for vmt, key, texture in self.missing_textures],
+            "materials": [{"qc": qc, "smd": smd, "material": material} for qc, smd, material in self.missing_materials],
+            "files": [{"qc": qc, "file": path} for qc, path in self.missing_files],
+        }
+
+    # what to redo after changes. models only bake in material names, so
+    # only qc/qci/smd changes need a recompile. vtf and vmt changes list the
+    # vmts that point at them and the models that show them, to regenerate
+    # or check in-game, without recompiling anything
+    def rebuild_plan(self, changes):
+        changed = changes["added"] + changes["changed"] + changes["removed"]
+        model_inputs = [path for path in changed if self.kind(path) in ('qc', 'qci', 'smd')]
+        material_inputs = [path for path in changed if self.kind(path) in ('vtf', 'vmt')]
+
+        compile_impact = self.impact(model_inputs)
+        qcs = set(compile_impact["qc"])
+        qcs.update(path for path in model_inputs if self.kind(path) == 'qc' and path in self.files)
+        material_impact = self.impact(material_inputs)
+        return {
+            "vmt": material_impact["vmt"],
+            "qc": sorted(qcs),
+            "output": sorted(set(compile_impact["output"]) | set(material_impact["output"])),
+        }
+
+
+# compile list for `compileQcs.py -compile`
+def write_compile_list(path, qcs, game=None):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("# written by depindex, QCs affected by the last changes\n")
+        if game:
+            f.write(f"game={game}\n")
+        for qc in qcs:
+            f.write(f"qc={qc}\n")
+
+
+def print_paths(title, paths, indent=''):
+    print(f"{indent}{title} ({len(paths)}):")
+    for path in paths:
+        print(f"{indent}  {path}")
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Index which materials and models depend on each texture, SMD and QC")
+    parser.add_argument('-input', '-i', action='append', help="QC file or folder to index. Can be used multiple times.")
+    parser.add_argument('-materials', '-m', help="Materials root the VMTs and VTFs live in")
+    parser.add_argument('-game', help="Game folder the compiled models are written to")
+    parser.add_argument('-index', default=DEFAULT_INDEX, help=f"Index file (default: {DEFAULT_INDEX})")
+    parser.add_argument('-deps', action='append', help="Print everything built from this file. Can be used multiple times.")
+    parser.add_argument('-changed', action='store_true', help="Print what changed since the last -changed run and what has to be rebuilt")
+    parser.add_argument('-compilelist', help="With -changed, write the QCs to recompile as a compileQcs.py -compile file")
+    parser.add_argument('-orphans', action='store_true', help="Print VTFs no VMT uses and VMTs no model uses")
+    parser.add_argument('-missing', action='store_true', help="Print textures, materials and SMDs that are referenced but missing")
+    parser.add_argument('-json', help="Write the requested reports to this JSON file")
+    args = parser.parse_args(argv)
+
+    index = DependencyIndex(args.index)
+    if not (args.input or index.inputs) or not (args.materials or index.materials_root):
+        parser.error("-input and -materials are required until the index has been built once")
+
+    # every run keeps its parse work, only -changed (or the first build)
+    # moves the baseline -changed compares against
+    changes = index.update(args.input, args.materials, args.game)
+    if index.baseline is None:
+        index.mark_baseline()
+    if args.changed:
+        changes_since = index.baseline_changes()
+        index.mark_baseline()
+    index.save()
+    print(f"Indexed {len(index.files)} files: {len(changes['added'])} added, {len(changes['changed'])} changed, "
+          f"{len(changes['removed'])} removed")
+
+    output = {}
+
+    for path in args.deps or []:
+        affected = index.impact([path])
+        output.setdefault("deps", {})[path] = affected
+        print(f"\n{path}")
+        for kind, paths in affected.items():
+            if paths:
+                print_paths(kind, paths, indent='  ')
+
+    if args.changed:
+        plan = index.rebuild_plan(changes_since)
+        output["changes"] = changes_since
+        output["rebuild"] = plan
+        print()
+        for kind in ("added", "changed", "removed"):
+            print_paths(kind, changes_since[kind])
+        print_paths("VMTs to regenerate", plan["vmt"])
+        print_paths("QCs to recompile", plan["qc"])
+        if args.compilelist:
+            write_compile_list(args.compilelist, plan["qc"], index.game)
+            print(f"Compile list written to {args.compilelist}")
+
+    if args.orphans:
+        orphans = index.orphans()
+        output["orphans"] = orphans
+        print()
+        print_paths("Unused VTFs", orphans["vtf"])
+        print_paths("Unused VMTs", orphans["vmt"])
+
+    if args.missing:
+        missing = index.missing()
+        output["missing"] = missing
+        print(f"\nMissing textures ({len(missing['textures'])}):")
+        for item in missing["textures"]:
+            print(f"  {item['vmt']}: {item['param']} \"{item['texture']}\"")
+        print(f"Missing materials ({len(missing['materials'])}):")
+        for item in missing["materials"]:
+            print(f"  {item['material']} (used by {item['smd']} in {item['qc']})")
+        print(f"Missing files ({len(missing['files'])}):")
+        for item in missing["files"]:
+            print(f"  {item['file']} (referenced by {item['qc']})")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(output, f, indent=4)
+        print(f"\nReport written to {args.json}")
+
+    return 0 if not (args.missing and any(index.missing().values())) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import hashlib
+
+# --------------------------------------------------------------------
+# Checkpoint journal
+# --------------------------------------------------------------------
+#
+# append-only jsonl file with one line per finished job:
+#
+#   {"job": "...", "fingerprint": "...", "status": "ok", "elapsed": 1.2, "time": ...}
+#
+# every line goes out in a single write followed by fsync, so a crash or
+# reboot can at worst leave a torn last line, which _load() cuts off. the
+# last line for a job wins, so a job that failed and later succeeded is done.
+
+DONE_STATUSES = ('ok', 'cached')
+
+
+# sha1 over size + mtime of each path plus any extra settings. missing
+# paths count too, so a file appearing or disappearing changes it
+def fingerprint(paths, extra=None):
+    h = hashlib.sha1()
+    for path in paths:
+        try:
+            st = os.stat(path)
+            h.update(f"{path}|{st.st_size}|{st.st_mtime_ns}\n".encode('utf-8'))
+        except OSError:
+            h.update(f"{path}|missing\n".encode('utf-8'))
+    if extra is not None:
+        h.update(json.dumps(extra, sort_keys=True).encode('utf-8'))
+    return h.hexdigest()
+
+
+class Journal:
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.entries = {}
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        if resume:
+            self._load()
+        elif os.path.exists(path):
+            # a fresh run starts a fresh journal
+            os.remove(path)
+
+    def _load(self):
+        if not os.path.isfile(self.path):
+            return
+        self._drop_torn_line()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and 'job' in record:
+                    self.entries[record['job']] = record
+
+    # a crash mid-write can leave a last line without its newline. cut it
+    # off, otherwise the next record would be appended onto it and lost too
+    def _drop_torn_line(self):
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if not data or data.endswith(b'\n'):
+                return
+            f.truncate(data.rfind(b'\n') + 1)
+            f.flush()
+            os.fsync(f.fileno())
+
+    # True if the job's last record finished successfully with the same inputs
+    def is_done(self, job, job_fingerprint):
+        record = self.entries.get(job)
+        return bool(record and record.get('status') in DONE_STATUSES
+                    and record.get('fingerprint') == job_fingerprint)
+
+    def record(self, job, job_fingerprint, status, elapsed=0.0):
+        record = {
+            "job": job,
+            "fingerprint": job_fingerprint,
+            "status": status,
+            "elapsed": round(elapsed, 3),
+            "time": time.time(),
+        }
+        line = json.dumps(record) + '\n'
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self.entries[job] = record
+
+    def counts(self):
+        counts = {}
+        for record in self.entries.values():
+            counts[record['status']] = counts.get(record['status'], 0) + 1
+        return counts
@@ -0,0 +1,30 @@
+import os
+import stat
+
+# --------------------------------------------------------------------
+# File replacement
+# --------------------------------------------------------------------
+#
+# outputs can be hardlinks to read-only VTF cache objects. windows refuses
+# to delete or replace over a read-only file, so these clear the flag on the
+# link being removed first. only os/stat are imported, so every batch can
+# use them without loading the cache module.
+
+# windows refuses to delete read-only files
+def remove_file(path):
+    try:
+        os.chmod(path, stat.S_IMODE(os.stat(path).st_mode) | stat.S_IWUSR)
+    except OSError:
+        pass
+    os.remove(path)
+
+
+# os.replace that also works over a read-only dest, which windows refuses
+def replace_file(src, dest):
+    try:
+        os.replace(src, dest)
+    except PermissionError:
+        if not os.path.exists(dest):
+            raise
+        remove_file(dest)
+        os.replace(src, dest)
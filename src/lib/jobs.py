@@ -0,0 +1,130 @@
+import os
+
+# --------------------------------------------------------------------
+# Batch job results
+# --------------------------------------------------------------------
+#
+# the iter_* batch functions (compileQcs.iter_compile_qcs,
+# MakeVTFbySuffix.iter_convert_folder, generate_vmt.iter_generate_vmts)
+# yield one JobResult per item as soon as it finishes.
+
+OK = 'ok'
+CACHED = 'cached'
+SKIPPED = 'skipped'          # already done in a resumed run
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+# keep at most this many diagnostic lines per job
+MAX_DIAGNOSTICS = 200
+
+
+# plain class rather than a dataclass: importing dataclasses roughly
+# doubles CLI startup time
+class JobResult:
+    __slots__ = ('kind', 'input', 'output', 'status', 'elapsed', 'returncode', 'diagnostics')
+
+    def __init__(self, kind, input, output=None, status=OK, elapsed=0.0, returncode=None, diagnostics=None):
+        self.kind: str = kind                       # 'compile', 'vtf', 'vmt' or 'smd'
+        self.input: str = input
+        self.output: str | None = output
+        self.status: str = status
+        self.elapsed: float = elapsed
+        self.returncode: int | None = returncode
+        self.diagnostics: list = diagnostics if diagnostics is not None else []
+
+    def __repr__(self):
+        return f"JobResult({self.kind!r}, {self.input!r}, status={self.status!r}, elapsed={self.elapsed:.3f})"
+
+    @property
+    def ok(self):
+        return self.status in (OK, CACHED, SKIPPED)
+
+    def add_diagnostic(self, message):
+        if len(self.diagnostics) < MAX_DIAGNOSTICS:
+            self.diagnostics.append(message)
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "input": self.input,
+            "output": self.output,
+            "status": self.status,
+            "elapsed": self.elapsed,
+            "returncode": self.returncode,
+            "diagnostics": list(self.diagnostics),
+        }
+
+
+# shared flag a caller (or another thread) sets to stop a batch. the batch
+# stops before its next item, running compiles are killed
+class CancelToken:
+    def __init__(self):
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+
+def is_cancelled(cancel):
+    return cancel is not None and cancel.cancelled
+
+
+# terminate first so the tool can exit on its own, kill if it hangs
+def stop_process(process, timeout=5):
+    import subprocess
+    if process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+# stops a running studiomdl/VTFCmd as soon as cancel is set, even while it
+# prints nothing. the returned dict's "stopped" tells if it had to. only
+# the exit code says how the process ended: one that finished just as the
+# token was set keeps its result
+def watch_cancel(process, cancel, interval=0.1):
+    state = {"stopped": False}
+    if cancel is None:
+        return state
+    import threading
+    import subprocess
+
+    def watch():
+        while True:
+            try:
+                process.wait(interval)
+                return
+            except subprocess.TimeoutExpired:
+                pass
+            if cancel.cancelled:
+                state["stopped"] = True
+                stop_process(process)
+                return
+
+    threading.Thread(target=watch, daemon=True).start()
+    return state
+
+
+# progress callbacks get (result, done, total). total is None when the
+# batch doesn't know its size up front
+def report(progress, result, done, total=None):
+    if progress:
+        progress(result, done, total)
+
+
+# argparse type for -jobs: a number or "auto" for one job per cpu
+def parse_jobs(value):
+    if str(value).lower() == 'auto':
+        return os.cpu_count() or 1
+    jobs = int(value)
+    if jobs < 1:
+        raise ValueError("jobs must be at least 1")
+    return jobs
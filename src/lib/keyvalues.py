@@ -0,0 +1,83 @@
+import re
+
+# --------------------------------------------------------------------
+# KeyValues tokenizer
+# --------------------------------------------------------------------
+#
+# reads the KeyValues text VMTs are written in:
+#
+#   "VertexLitGeneric"
+#   {
+#       $basetexture "models/props/crate_color"   // comment
+#       $phong 1
+#       Proxies { ... }
+#   }
+#
+# one regex pulls every token in C, the python loop only builds dicts.
+# keys are lowercased like the engine treats them, the last duplicate wins,
+# and [$WIN32] style conditionals are dropped. an unquoted [1 1 1] vector
+# stays one value.
+
+# quoted string | brace | comment | bracketed | bare word
+_TOKEN = re.compile(r'"([^"\n]*)"?|([{}])|//[^\n]*|(\[[^\]\n]*\])|([^\s{}"]+)')
+
+_QUOTED, _BRACE, _BRACKET, _WORD = 1, 2, 3, 4
+
+
+class KeyValuesError(ValueError):
+    pass
+
+
+# yields (kind, text) with kind 'string' or 'brace'. quoted and bare
+# words are both 'string'
+def tokenize(text):
+    for match in _TOKEN.finditer(text):
+        group = match.lastindex
+        if group is None:
+            continue
+        if group == _BRACE:
+            yield 'brace', match.group(_BRACE)
+            continue
+        value = match.group(group)
+        if group == _BRACKET:
+            # [$WIN32], [!$X360 && $WIN32]
+            if value[1:].lstrip().startswith(('$', '!')):
+                continue
+        elif group == _WORD and value.startswith('['):
+            raise KeyValuesError(f"Missing ']' after '{value}'")
+        yield 'string', value
+
+
+def _block(tokens):
+    block = {}
+    key = None
+    for kind, value in tokens:
+        if kind == 'brace':
+            if value == '}':
+                if key is not None:
+                    raise KeyValuesError(f"Key '{key}' has no value")
+                return block
+            if key is None:
+                raise KeyValuesError("Block without a key")
+            block[key.lower()] = _block(tokens)
+            key = None
+        elif key is None:
+            key = value
+        else:
+            block[key.lower()] = value
+            key = None
+    raise KeyValuesError("Missing closing '}'")
+
+
+# returns (root name, {key: value or nested dict}) of the first root block
+def parse_keyvalues(text):
+    tokens = tokenize(text)
+    for kind, value in tokens:
+        if kind != 'string':
+            raise KeyValuesError(f"Expected a name before '{value}'")
+        for kind, brace in tokens:
+            if brace != '{':
+                raise KeyValuesError(f"Expected '{{' after '{value}'")
+            return value, _block(tokens)
+        raise KeyValuesError(f"Expected '{{' after '{value}'")
+    raise KeyValuesError("Empty file")
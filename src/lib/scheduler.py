@@ -0,0 +1,333 @@
+import os
+import json
+import time
+import queue
+import threading
+
+from .jobs import is_cancelled
+
+# --------------------------------------------------------------------
+# Adaptive job scheduler
+# --------------------------------------------------------------------
+#
+# runs external tool jobs (studiomdl, VTFCmd) on worker threads and keeps
+# changing how many run at once, based on system pressure:
+#
+#   - cpu: runnable processes vs cpu count, busy share of cpu time
+#   - memory: MemAvailable, and a per-job memory estimate from input size
+#   - disk: share of cpu time spent waiting on io
+#
+# on linux everything comes from /proc. elsewhere psutil is used if it is
+# installed, otherwise the limit stays at max_jobs.
+#
+# every change of the limit is recorded with the readings that caused it,
+# report() returns them for the run report.
+
+# memory a job needs per byte of input. studiomdl holds the whole mesh plus
+# its own tables, VTFCmd decodes the image to RGBA and builds mipmaps
+MEMORY_FACTORS = {"compile": 12.0, "vtf": 8.0}
+DEFAULT_MEMORY_FACTOR = 8.0
+
+# seconds per MB of input when a kind has no history yet
+DEFAULT_SECONDS_PER_MB = 1.0
+
+# always keep this much memory free
+MEMORY_RESERVE = 512 * 1024 * 1024
+
+# thresholds for lowering / raising the limit
+HIGH_RUNNABLE = 1.25    # runnable processes per cpu
+HIGH_IOWAIT = 0.25      # share of cpu time waiting on disk
+LOW_BUSY = 0.85         # below this cpu share there is room for another job
+LOW_IOWAIT = 0.10
+
+_MB = 1024 * 1024
+
+
+class SystemMonitor:
+    def __init__(self):
+        self.cpus = os.cpu_count() or 1
+        self.proc = os.path.isfile('/proc/stat') and os.path.isfile('/proc/meminfo')
+        self.psutil = None
+        if not self.proc:
+            try:
+                import psutil
+                self.psutil = psutil
+            except ImportError:
+                pass
+        self._last_cpu = None
+
+    @property
+    def available(self):
+        return bool(self.proc or self.psutil)
+
+    def _read_proc_stat(self):
+        cpu = None
+        runnable = None
+        with open('/proc/stat', 'r') as f:
+            for line in f:
+                if line.startswith('cpu '):
+                    cpu = [int(x) for x in line.split()[1:]]
+                elif line.startswith('procs_running'):
+                    runnable = int(line.split()[1])
+        return cpu, runnable
+
+    def _read_meminfo(self):
+        info = {}
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('MemTotal', 'MemAvailable'):
+                    info[key] = int(value.split()[0]) * 1024
+        return info.get('MemTotal'), info.get('MemAvailable')
+
+    # returns a dict of readings. busy/iowait are shares of the cpu time
+    # since the previous sample, None on the first one
+    def sample(self):
+        reading = {"time": time.time(), "cpus": self.cpus, "load1": None, "runnable": None,
+                   "busy": None, "iowait": None, "mem_total": None, "mem_available": None}
+
+        if self.proc:
+            cpu, runnable = self._read_proc_stat()
+            reading["runnable"] = runnable
+            # the reading process itself counts as runnable
+            if runnable is not None:
+                reading["runnable"] = max(0, runnable - 1)
+            if cpu and self._last_cpu:
+                delta = [a - b for a, b in zip(cpu, self._last_cpu)]
+                total = sum(delta)
+                if total > 0:
+                    idle = delta[3]
+                    iowait = delta[4] if len(delta) > 4 else 0
+                    reading["busy"] = 1.0 - (idle + iowait) / total
+                    reading["iowait"] = iowait / total
+            self._last_cpu = cpu
+            reading["mem_total"], reading["mem_available"] = self._read_meminfo()
+            reading["load1"] = os.getloadavg()[0]
+        elif self.psutil:
+            reading["busy"] = self.psutil.cpu_percent(interval=None) / 100.0
+            memory = self.psutil.virtual_memory()
+            reading["mem_total"], reading["mem_available"] = memory.total, memory.available
+        return reading
+
+
+# learns seconds per MB for each job kind, and the last duration of every
+# job key, and saves them between runs
+class CostModel:
+    def __init__(self, path=None):
+        self.path = path
+        self.data = {"kinds": {}, "jobs": {}}
+        if path and os.path.isfile(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.data.update(json.load(f))
+            except (OSError, ValueError):
+                pass
+
+    def estimate_seconds(self, kind, key, size):
+        last = self.data["jobs"].get(key)
+        if last:
+            return last["seconds"]
+        rate = self.data["kinds"].get(kind, {}).get("seconds_per_mb", DEFAULT_SECONDS_PER_MB)
+        return rate * max(size, 1) / _MB
+
+    def estimate_memory(self, kind, size):
+        return int(size * MEMORY_FACTORS.get(kind, DEFAULT_MEMORY_FACTOR))
+
+    def record(self, kind, key, size, seconds):
+        self.data["jobs"][key] = {"seconds": round(seconds, 3), "size": size}
+        if size > 0:
+            rate = seconds / (size / _MB)
+            stats = self.data["kinds"].setdefault(kind, {"seconds_per_mb": rate, "samples": 0})
+            # moving average so the rate follows new hardware / tool versions
+            stats["seconds_per_mb"] = 0.8 * stats["seconds_per_mb"] + 0.2 * rate
+            stats["samples"] += 1
+
+    def save(self):
+        if not self.path:
+            return
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=4)
+        os.replace(tmp, self.path)
+
+
+class Job:
+    def __init__(self, key, fn, kind='job', size=0):
+        self.key = key
+        self.fn = fn
+        self.kind = kind
+        self.size = size
+        self.seconds = 0.0
+        self.memory = 0
+
+
+class AdaptiveScheduler:
+    Job = Job
+
+    def __init__(self, max_jobs=None, min_jobs=1, cost_model=None, monitor=None,
+                 interval=0.5, memory_reserve=MEMORY_RESERVE):
+        self.monitor = monitor or SystemMonitor()
+        self.max_jobs = max(1, max_jobs or self.monitor.cpus)
+        self.min_jobs = max(1, min(min_jobs, self.max_jobs))
+        self.cost_model = cost_model or CostModel()
+        self.interval = interval
+        self.memory_reserve = memory_reserve
+        self.limit = max(self.min_jobs, min(self.max_jobs, self.monitor.cpus // 2 or 1))
+        self.decisions = []
+        self.peak = 0
+        self.started = None
+        self.finished = None
+
+    def _decide(self, reading, running):
+        old = self.limit
+        reasons = []
+        cpus = reading["cpus"]
+
+        runnable = reading["runnable"]
+        if runnable is not None and runnable > cpus * HIGH_RUNNABLE:
+            reasons.append(f"cpu overloaded ({runnable} runnable on {cpus} cpus)")
+        if reading["iowait"] is not None and reading["iowait"] > HIGH_IOWAIT:
+            reasons.append(f"io wait {reading['iowait']:.0%}")
+        if reading["mem_available"] is not None and reading["mem_available"] < self.memory_reserve:
+            reasons.append(f"low memory ({reading['mem_available'] // _MB} MB available)")
+
+        if reasons:
+            self.limit = max(self.min_jobs, self.limit - 1)
+        elif (running >= self.limit and reading["busy"] is not None and reading["busy"] < LOW_BUSY
+              and (reading["iowait"] or 0) < LOW_IOWAIT):
+            self.limit = min(self.max_jobs, self.limit + 1)
+            reasons.append(f"cpu {reading['busy']:.0%} busy with {running} jobs")
+
+        if self.limit != old:
+            self._record(reading, running, old, "; ".join(reasons))
+
+    def _record(self, reading, running, old, reason):
+        self.decisions.append({
+            "time": round(reading["time"] - (self.started or reading["time"]), 3),
+            "from": old,
+            "to": self.limit,
+            "running": running,
+            "reason": reason,
+            "load1": reading["load1"],
+            "busy": reading["busy"],
+            "iowait": reading["iowait"],
+            "mem_available_mb": reading["mem_available"] // _MB if reading["mem_available"] else None,
+        })
+
+    # a job is only started if its memory estimate fits next to the
+    # estimates of the running jobs, unless nothing is running, otherwise a
+    # single big job could never start. readings are up to `interval` old
+    # and lag behind jobs that are still loading, so the running estimates
+    # are always counted even if some of that memory is already in use
+    def _fits(self, job, reading, running_memory):
+        available = reading["mem_available"]
+        if available is None or running_memory == 0:
+            return True
+        return running_memory + job.memory + self.memory_reserve <= available
+
+    # runs every job and yields (job, result) as they complete. results are
+    # whatever job.fn returns, exceptions are yielded as the result. with a
+    # cancel token set no new jobs start and running ones are waited for
+    # (compile and convert jobs stop their child process themselves). on Ctrl-C
+    # the token is set and running jobs are waited for before re-raising, so
+    # they can clean up their children and partial files
+    def run(self, jobs, cancel=None):
+        pending = list(jobs)
+        for job in pending:
+            job.seconds = self.cost_model.estimate_seconds(job.kind, job.key, job.size)
+            job.memory = self.cost_model.estimate_memory(job.kind, job.size)
+        # longest jobs first keeps the tail of the run short
+        pending.sort(key=lambda job: job.seconds, reverse=True)
+
+        done = queue.Queue()
+        running = {}
+        self.started = time.time()
+        if not self.monitor.available:
+            old, self.limit = self.limit, self.max_jobs
+            self._record(self.monitor.sample(), 0, old, "no system readings, fixed limit")
+
+        def worker(job):
+            start = time.perf_counter()
+            try:
+                result = job.fn()
+            except Exception as e:
+                result = e
+            done.put((job, result, time.perf_counter() - start))
+
+        reading = self.monitor.sample()
+        last_sample = time.perf_counter()
+
+        try:
+            while pending or running:
+                # readings over very short windows are mostly noise
+                if time.perf_counter() - last_sample >= self.interval:
+                    reading = self.monitor.sample()
+                    last_sample = time.perf_counter()
+                    if self.monitor.available:
+                        self._decide(reading, len(running))
+
+                running_memory = sum(job.memory for job in running.values())
+                while pending and len(running) < self.limit and not is_cancelled(cancel):
+                    job = pending[0]
+                    if not self._fits(job, reading, running_memory):
+                        break
+                    pending.pop(0)
+                    thread = threading.Thread(target=worker, args=(job,), daemon=True)
+                    running[id(job)] = job
+                    running_memory += job.memory
+                    thread.start()
+                    self.peak = max(self.peak, len(running))
+
+                if is_cancelled(cancel):
+                    pending.clear()
+                if not running:
+                    continue
+
+                try:
+                    job, result, elapsed = done.get(timeout=self.interval)
+                except queue.Empty:
+                    continue
+                del running[id(job)]
+                if not isinstance(result, Exception):
+                    self.cost_model.record(job.kind, job.key, job.size, elapsed)
+                yield job, result
+        except KeyboardInterrupt:
+            if cancel is not None:
+                cancel.cancel()
+            while running:
+                job, _, _ = done.get()
+                del running[id(job)]
+            raise
+        finally:
+            self.finished = time.time()
+            self.cost_model.save()
+
+    def report(self):
+        return {
+            "max_jobs": self.max_jobs,
+            "min_jobs": self.min_jobs,
+            "final_limit": self.limit,
+            "peak_running": self.peak,
+            "readings": "proc" if self.monitor.proc else "psutil" if self.monitor.psutil else "none",
+            "wall_seconds": round((self.finished or time.time()) - (self.started or time.time()), 3),
+            "decisions": self.decisions,
+        }
+
+
+def print_report(report):
+    print(f"Scheduler: peak {report['peak_running']} of max {report['max_jobs']} jobs, "
+          f"{len(report['decisions'])} adjustments ({report['readings']} readings)")
+    for decision in report['decisions']:
+        print(f"  {decision['time']:>8.1f}s  {decision['from']} -> {decision['to']}  {decision['reason']}")
+
+
+# writes results + scheduler decisions as json
+def write_run_report(path, results, scheduler=None):
+    data = {
+        "results": [result.to_dict() for result in results],
+        "scheduler": scheduler.report() if scheduler else None,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
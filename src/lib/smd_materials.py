@@ -0,0 +1,108 @@
+import os
+import re
+import mmap
+
+# --------------------------------------------------------------------
+# SMD material fast path
+# --------------------------------------------------------------------
+#
+# listing materials is the most common smd query, and SMDFile walks every
+# line in python to get them. here the file is memory-mapped, the regex
+# engine jumps straight to the `triangles` block and walks it in C,
+# relying on the fixed layout of one material line followed by three
+# vertex lines. vertex data is never decoded.
+
+_TRIANGLES = re.compile(rb'^[ \t]*triangles[ \t]*\r?$', re.MULTILINE)
+# one triangle: material line + three vertex lines. `.` stops at \n so the
+# regex engine skips the vertex lines in C and only the material line is
+# captured. this runs on the mmap directly, nothing gets copied
+_TRIANGLE = re.compile(rb'(.*)\n.*\n.*\n.*\n')
+# a block without an `end` runs to the end of the file, where the last
+# triangle may miss its trailing newline or even vertex lines. SMDFile still
+# counts its material, so that block is scanned with this slower pattern
+_LAST_TRIANGLES = re.compile(rb'(?=[\s\S])(.*)(?:\n.*){0,3}(?:\n|\Z)')
+
+# below this many bytes in total a process pool costs more than it saves
+POOL_MIN_BYTES = 64 * 1024 * 1024
+
+
+# vertex lines start with a bone index, so the first `end` line after the
+# block start is the terminator (same as SMDFile, a material named "end"
+# ends the block there too). a plain find is much faster than a multiline
+# regex over hundreds of MB
+def _find_end(mm, start, size):
+    pos = start - 1
+    while True:
+        pos = mm.find(b'\nend', pos)
+        if pos < 0:
+            return size, size
+        eol = mm.find(b'\n', pos + 1)
+        eol = size if eol < 0 else eol
+        if mm[pos + 4:eol].strip() == b'':
+            return pos + 1, eol
+        pos += 1
+
+
+def _scan(mm):
+    found = set()
+    size = len(mm)
+    pos = 0
+    while True:
+        match = _TRIANGLES.search(mm, pos)
+        if not match:
+            break
+        start = mm.find(b'\n', match.end())
+        if start < 0:
+            break
+        start += 1
+        end, pos = _find_end(mm, start, size)
+        pattern = _TRIANGLE if end < size else _LAST_TRIANGLES
+        found.update(pattern.findall(mm, start, end))
+    return {name.strip().decode('utf-8') for name in found}
+
+
+# returns the set of material names used by the smd's triangles
+def read_materials(path):
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return set()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _scan(mm)
+
+
+def _read_or_error(path):
+    try:
+        return path, read_materials(path), None
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return path, None, e
+
+
+# reads many smds, using a process pool when there is enough data to make it
+# worth it. returns ({path: materials}, {path: error}) so one unreadable smd
+# doesn't fail the batch. workers=1 forces a serial scan
+def read_materials_many(paths, workers=None):
+    paths = list(paths)
+    results = {}
+    errors = {}
+
+    total = 0
+    for path in paths:
+        try:
+            total += os.path.getsize(path)
+        except OSError:
+            pass
+
+    if workers == 1 or len(paths) < 2 or (workers is None and total < POOL_MIN_BYTES):
+        scanned = map(_read_or_error, paths)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        workers = workers or min(len(paths), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            scanned = list(pool.map(_read_or_error, paths, chunksize=max(1, len(paths) // (workers * 4))))
+
+    for path, materials, error in scanned:
+        if error is None:
+            results[path] = materials
+        else:
+            errors[path] = error
+    return results, errors
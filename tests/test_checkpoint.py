@@ -0,0 +1,18 @@
+from src.lib.checkpoint import Journal
+
+
+def test_resume_after_torn_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = Journal(str(path))
+    journal.record("a", "fp", "ok")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"job": "b", "finger')
+
+    journal = Journal(str(path), resume=True)
+    assert journal.is_done("a", "fp")
+    assert not journal.is_done("b", "fp")
+    journal.record("c", "fp", "ok")
+
+    journal = Journal(str(path), resume=True)
+    assert journal.is_done("a", "fp")
+    assert journal.is_done("c", "fp")
@@ -0,0 +1,107 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from src import compileQcs
+from src.lib.checkpoint import Journal
+from src.lib.jobs import CANCELLED, FAILED, OK, SKIPPED, CancelToken
+
+# prints a line per qc line, exits with 1 on $fail and finishes cleanly
+# when terminated after $trap
+FAKE_STUDIOMDL = f"""#!{sys.executable}
+import signal, sys, time
+for line in open(sys.argv[-1]):
+    print(line.strip(), flush=True)
+    if line.startswith('$trap'):
+        signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+    if line.startswith('$sleep'):
+        time.sleep(float(line.split()[1]))
+    if line.startswith('$fail'):
+        sys.exit(1)
+"""
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    if sys.platform == 'win32':
+        pytest.skip("the studiomdl stub is a shebang script")
+    studiomdl = str(tmp_path / 'bin' / 'studiomdl')
+    write(studiomdl, FAKE_STUDIOMDL)
+    os.chmod(studiomdl, 0o755)
+    game = str(tmp_path / 'game')
+    os.makedirs(game)
+    return tmp_path, studiomdl, game
+
+
+def run_main(tmp_path, studiomdl, game, qcs, *args):
+    argv = ['-studiomdl', studiomdl, '-game', game, '-logdir', str(tmp_path / 'logs'),
+            '-journal', str(tmp_path / 'journal.jsonl'), '-history', str(tmp_path / 'history.json')]
+    for qc in qcs:
+        argv += ['-qc', qc]
+    compileQcs.main(argv + list(args))
+    return Journal(str(tmp_path / 'journal.jsonl'), resume=True).entries
+
+
+@pytest.mark.parametrize('jobs', ['1', '2'])
+def test_serial_and_parallel_share_resume(tree, capsys, jobs):
+    tmp_path, studiomdl, game = tree
+    good = str(tmp_path / 'qc' / 'good.qc')
+    bad = str(tmp_path / 'qc' / 'bad.qc')
+    missing = str(tmp_path / 'qc' / 'missing.qc')
+    write(good, '$modelname "good.mdl"\n')
+    write(bad, '$fail\n')
+
+    entries = run_main(tmp_path, studiomdl, game, [good, bad, missing], '-jobs', jobs)
+    # only serial compiles stream studiomdl's output
+    assert ('$modelname "good.mdl"' in capsys.readouterr().out) == (jobs == '1')
+    assert entries[good]['status'] == OK
+    assert entries[bad]['status'] == FAILED and entries[bad]['elapsed'] > 0
+    assert entries[missing]['status'] == FAILED
+
+    capsys.readouterr()
+    run_main(tmp_path, studiomdl, game, [good, bad], '-jobs', jobs, '-resume')
+    out = capsys.readouterr().out
+    assert f"Skipping (already compiled): {good}" in out
+    assert f"Compile failed: {bad}" in out
+
+
+def cancel_after(seconds):
+    cancel = CancelToken()
+    timer = threading.Timer(seconds, cancel.cancel)
+    timer.start()
+    return cancel
+
+
+def test_cancel_stops_silent_studiomdl(tree):
+    tmp_path, studiomdl, game = tree
+    qc = str(tmp_path / 'qc' / 'slow.qc')
+    write(qc, '$sleep 20\n')
+    logs = str(tmp_path / 'logs')
+    os.makedirs(logs)
+
+    start = time.perf_counter()
+    result = compileQcs.compile_qc(studiomdl, game, qc, logs, cancel=cancel_after(0.3))
+    assert time.perf_counter() - start < 5
+    assert result.status == CANCELLED
+    assert os.listdir(logs) == []
+
+
+def test_exit_code_decides_status_after_cancel(tree):
+    tmp_path, studiomdl, game = tree
+    qc = str(tmp_path / 'qc' / 'trap.qc')
+    write(qc, '$trap\n$sleep 20\n')
+    logs = str(tmp_path / 'logs')
+    os.makedirs(logs)
+
+    result = compileQcs.compile_qc(studiomdl, game, qc, logs, cancel=cancel_after(0.3))
+    assert result.status == OK
+    assert result.output and os.path.isfile(result.output)
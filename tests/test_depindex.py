@@ -0,0 +1,80 @@
+import os
+
+from src import depindex
+
+SMD = """version 1
+nodes
+0 "root" -1
+end
+skeleton
+time 0
+0 0 0 0 0 0 0
+end
+triangles
+mat_b
+0 0 0 0 0 0 1 0 0
+0 1 0 0 0 0 1 0 0
+0 0 1 0 0 0 1 0 0
+end
+"""
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def make_tree(root):
+    qc_dir = os.path.join(root, 'qc')
+    materials = os.path.join(root, 'game', 'materials')
+    write(os.path.join(qc_dir, 'm.qc'), '$modelname "t/m.mdl"\n$cdmaterials "models/t"\n$include "common.qci"\n')
+    write(os.path.join(qc_dir, 'common.qci'), '$scale 1.0\n')
+    write(os.path.join(qc_dir, 'b.smd'), SMD)
+    write(os.path.join(materials, 'models', 't', 'mat_b.vmt'),
+          '"VertexLitGeneric"\n{\n    $basetexture "models/t/mat_b_color"\n}\n')
+    write(os.path.join(materials, 'models', 't', 'mat_b_color.vtf'), 'VTF')
+    return qc_dir, materials, os.path.join(root, 'game')
+
+
+def test_qci_change_reparses_including_qc(tmp_path):
+    qc_dir, materials, game = make_tree(str(tmp_path))
+    vtf = os.path.join(materials, 'models', 't', 'mat_b_color.vtf')
+    index_path = str(tmp_path / 'index.json')
+
+    index = depindex.DependencyIndex(index_path)
+    index.update([qc_dir], materials, game)
+    index.save()
+    assert index.impact([vtf])["qc"] == []
+
+    write(os.path.join(qc_dir, 'common.qci'), '$scale 1.0\n$body "b" "b.smd"\n')
+    index = depindex.DependencyIndex(index_path)
+    changes = index.update()
+    assert depindex.norm(os.path.join(qc_dir, 'common.qci')) in changes["changed"]
+
+    affected = index.impact([vtf])
+    assert affected["smd"] == [depindex.norm(os.path.join(qc_dir, 'b.smd'))]
+    assert affected["qc"] == [depindex.norm(os.path.join(qc_dir, 'm.qc'))]
+    assert len(affected["output"]) == len(depindex.MODEL_OUTPUT_EXTENSIONS)
+    assert index.rebuild_plan(changes)["qc"] == [depindex.norm(os.path.join(qc_dir, 'm.qc'))]
+
+
+def test_queries_do_not_move_the_changed_baseline(tmp_path, capsys):
+    qc_dir, materials, game = make_tree(str(tmp_path))
+    index_path = str(tmp_path / 'index.json')
+    compile_list = str(tmp_path / 'changed.txt')
+    smd = os.path.join(qc_dir, 'b.smd')
+    write(os.path.join(qc_dir, 'common.qci'), '$body "b" "b.smd"\n')
+
+    depindex.main(['-i', qc_dir, '-m', materials, '-game', game, '-index', index_path])
+    write(smd, SMD + '\n')
+    depindex.main(['-index', index_path, '-deps', smd, '-orphans', '-missing'])
+    # the query saved its parse work, so nothing is re-read
+    assert depindex.DependencyIndex(index_path).update() == {"added": [], "changed": [], "removed": []}
+    depindex.main(['-index', index_path, '-changed', '-compilelist', compile_list])
+
+    with open(compile_list, 'r', encoding='utf-8') as f:
+        assert f"qc={depindex.norm(os.path.join(qc_dir, 'm.qc'))}\n" in f.read()
+    depindex.main(['-index', index_path, '-changed', '-compilelist', compile_list])
+    with open(compile_list, 'r', encoding='utf-8') as f:
+        assert "qc=" not in f.read()
@@ -0,0 +1,74 @@
+import pytest
+
+from src.lib.keyvalues import KeyValuesError, parse_keyvalues, tokenize
+
+
+def strings(text):
+    return [value for kind, value in tokenize(text) if kind == 'string']
+
+
+def test_comments():
+    text = '// header\n"VertexLitGeneric" // shader\n{\n  $basetexture "models/a" // trailing\n' \
+           '  $envmap "http://not/a/comment"\n}\n'
+    assert strings(text) == ['VertexLitGeneric', '$basetexture', 'models/a', '$envmap', 'http://not/a/comment']
+    assert parse_keyvalues(text) == ('VertexLitGeneric', {'$basetexture': 'models/a',
+                                                          '$envmap': 'http://not/a/comment'})
+
+
+def test_conditionals_are_dropped():
+    text = '"LightmappedGeneric"\n{\n  $bumpmap "a_normal" [$WIN32]\n  $envmap env_cubemap [!$X360 && $WIN32]\n}\n'
+    assert parse_keyvalues(text)[1] == {'$bumpmap': 'a_normal', '$envmap': 'env_cubemap'}
+
+
+def test_nested_proxies():
+    text = '''"VertexLitGeneric"
+{
+    $basetexture "models/a"
+    Proxies
+    {
+        AnimatedTexture
+        {
+            animatedtexturevar $basetexture
+            animatedtextureframerate 10
+        }
+        Sine { resultvar "$color[0]" sineperiod 2 }
+    }
+}
+'''
+    _, params = parse_keyvalues(text)
+    assert params['$basetexture'] == 'models/a'
+    assert params['proxies'] == {
+        'animatedtexture': {'animatedtexturevar': '$basetexture', 'animatedtextureframerate': '10'},
+        'sine': {'resultvar': '$color[0]', 'sineperiod': '2'},
+    }
+
+
+def test_unterminated_quote_ends_at_line_end():
+    text = '"VertexLitGeneric"\n{\n  $basetexture "models/a\n  $phong 1\n}\n'
+    assert parse_keyvalues(text)[1] == {'$basetexture': 'models/a', '$phong': '1'}
+
+
+def test_duplicate_keys_last_wins():
+    text = '"VertexLitGeneric"\n{\n  $BaseTexture "models/a"\n  $basetexture "models/b"\n}\n'
+    assert parse_keyvalues(text)[1] == {'$basetexture': 'models/b'}
+
+
+def test_bracketed_vector_is_one_value():
+    text = '"UnlitGeneric"\n{\n  $color [1 0.5 0]\n  $basetexturetransform "center .5 .5"\n}\n'
+    assert parse_keyvalues(text)[1] == {'$color': '[1 0.5 0]', '$basetexturetransform': 'center .5 .5'}
+
+
+def test_unterminated_bracket_is_reported():
+    with pytest.raises(KeyValuesError, match=r"Missing '\]'"):
+        parse_keyvalues('"UnlitGeneric"\n{\n  $color [1 0.5 0\n}\n')
+
+
+@pytest.mark.parametrize('text, message', [
+    ('', "Empty file"),
+    ('"VertexLitGeneric"\n{\n  $basetexture\n}\n', "has no value"),
+    ('"VertexLitGeneric"\n{\n  $basetexture "a"\n', "Missing closing"),
+    ('"VertexLitGeneric"\n$basetexture "a"\n', "Expected '{'"),
+])
+def test_errors(text, message):
+    with pytest.raises(KeyValuesError, match=message):
+        parse_keyvalues(text)
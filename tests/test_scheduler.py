@@ -0,0 +1,50 @@
+import threading
+import time
+
+from src.lib.scheduler import AdaptiveScheduler, CostModel, Job
+
+_GB = 1024 ** 3
+
+
+class FakeMonitor:
+    proc = True
+    psutil = None
+    available = True
+
+    def __init__(self, mem_available, cpus=8):
+        self.cpus = cpus
+        self.mem_available = mem_available
+
+    def sample(self):
+        return {"time": time.time(), "cpus": self.cpus, "load1": 0.0, "runnable": 0,
+                "busy": 0.1, "iowait": 0.0, "mem_total": 16 * _GB, "mem_available": self.mem_available}
+
+
+def run_jobs(mem_available, job_memory, count=4):
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def work():
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.05)
+        with lock:
+            state["running"] -= 1
+        return True
+
+    scheduler = AdaptiveScheduler(max_jobs=4, cost_model=CostModel(), monitor=FakeMonitor(mem_available),
+                                  interval=0.01, memory_reserve=512 * 1024 * 1024)
+    # compile jobs need 12x their input size
+    jobs = [Job(f"job{i}", work, kind='compile', size=job_memory // 12) for i in range(count)]
+    results = list(scheduler.run(jobs))
+    assert len(results) == count
+    return state["peak"]
+
+
+def test_memory_of_running_jobs_is_counted():
+    assert run_jobs(4 * _GB, 3 * _GB) == 1
+
+
+def test_jobs_run_in_parallel_when_memory_allows():
+    assert run_jobs(64 * _GB, 1 * _GB) > 1
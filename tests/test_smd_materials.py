@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from src.lib.SMDpraser import SMDFile
+from src.lib.smd_materials import read_materials, read_materials_many
+
+HEADER = 'version 1\nnodes\n0 "root" -1\nend\nskeleton\ntime 0\n0 0 0 0 0 0 0\nend\n'
+VERTEX = '0 0 0 0 0 0 1 0 0\n'
+
+
+def triangles(*materials):
+    return 'triangles\n' + ''.join(material + '\n' + VERTEX * 3 for material in materials) + 'end\n'
+
+
+CASES = {
+    "lf": HEADER + triangles('mat_a', 'mat_b', 'mat_a'),
+    "crlf": (HEADER + triangles('mat_a', 'mat_b')).replace('\n', '\r\n'),
+    "blocks": HEADER + triangles('mat_a') + triangles('mat_b', 'mat_c') + triangles('mat_d'),
+    "end_prefix": HEADER + triangles('endcap', 'end_mat', 'ending', 'mat_a'),
+    "no_end": HEADER + 'triangles\nmat_a\n' + VERTEX * 3 + 'mat_b\n' + VERTEX * 3,
+    "no_end_no_newline": 'triangles\nA\n0\n0\n0\nB\n0\n0\n0',
+    "truncated_triangle": 'triangles\nA\n0\n0\n0\nB\n0',
+    "crlf_no_end_no_newline": 'triangles\r\nA\r\n0\r\n0\r\n0\r\nB\r\n0\r\n0\r\n0',
+    "no_triangles": HEADER,
+    "empty": '',
+}
+
+
+def write(path, text):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_matches_smdfile(tmp_path, name):
+    path = str(tmp_path / f'{name}.smd')
+    write(path, CASES[name])
+    assert read_materials(path) == SMDFile(path).materials
+
+
+def test_read_many_reports_errors_per_file(tmp_path):
+    good = str(tmp_path / 'good.smd')
+    write(good, CASES["lf"])
+    bad = str(tmp_path / 'bad.smd')
+    with open(bad, 'wb') as f:
+        f.write(b'triangles\n\xff\xfe\n0\n0\n0\nend\n')
+    missing = str(tmp_path / 'missing.smd')
+
+    for workers in (1, 2):
+        results, errors = read_materials_many([good, bad, missing], workers=workers)
+        assert results == {good: {'mat_a', 'mat_b'}}
+        assert isinstance(errors[bad], UnicodeDecodeError)
+        assert isinstance(errors[missing], OSError)
+        assert set(errors) == {bad, missing}
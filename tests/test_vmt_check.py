@@ -0,0 +1,24 @@
+import os
+
+from src.VTFmanager.vmt_check import validate_vmts
+
+VMT = '"VertexLitGeneric"\n{\n    $basetexture "models/t/mat_color"\n    $bumpmap ""\n}\n'
+
+
+def test_planned_texts_are_returned_under_the_diff_paths(tmp_path):
+    materials = tmp_path / 'materials'
+    (materials / 'models' / 't').mkdir(parents=True)
+    (materials / 'models' / 't' / 'mat_color.vtf').write_bytes(b'VTF')
+    (materials / 'models' / 't' / 'old.vmt').write_text('"VertexLitGeneric"\n{\n}\n')
+
+    # not normalised, like a material name with a folder in it
+    planned = {
+        os.path.join(str(materials), 'models', 't', '.', 'old.vmt'): VMT,
+        os.path.join(str(materials), 'models', 't', 'sub', '..', 'new.vmt'): VMT,
+    }
+    check = validate_vmts(str(materials), planned)
+
+    assert len(check["diff"]["added"]) == 1 and len(check["diff"]["changed"]) == 1
+    for path in check["diff"]["added"] + check["diff"]["changed"]:
+        assert check["new"][path] == VMT
+    assert all(issues == ["Empty $bumpmap"] for issues in check["issues"].values())
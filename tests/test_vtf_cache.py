@@ -0,0 +1,189 @@
+import os
+import stat
+import sys
+import threading
+import time
+
+import pytest
+
+from src.VTFmanager import vtf_cache
+from src.VTFmanager.MakeVTFbySuffix import convert_texture
+from src.lib.jobs import CACHED, CANCELLED, CancelToken
+
+RULE = {"format": "DXT1", "alphaformat": None, "extra_flags": ["-nomipmaps"]}
+
+# writes <output>/<name>.vtf holding the format and the input bytes
+FAKE_VTFCMD = f"""#!{sys.executable}
+import os, sys
+args = dict(zip(sys.argv[1::2], sys.argv[2::2]))
+if args['-format'] == 'SLOW':
+    import time
+    time.sleep(20)
+name = os.path.splitext(os.path.basename(args['-file']))[0] + '.vtf'
+with open(args['-file'], 'rb') as src, open(os.path.join(args['-output'], name), 'wb') as out:
+    out.write(args['-format'].encode() + b':' + src.read())
+"""
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def writable(path):
+    return bool(os.stat(path).st_mode & stat.S_IWUSR)
+
+
+@pytest.fixture
+def vtfcmd(tmp_path):
+    if sys.platform == 'win32':
+        pytest.skip("the VTFCmd stub is a shebang script")
+    path = str(tmp_path / 'bin' / 'VTFCmd')
+    write(path, FAKE_VTFCMD.encode())
+    os.chmod(path, 0o755)
+    return path
+
+
+def test_key_changes_with_inputs(tmp_path):
+    src = str(tmp_path / 'a_color.tga')
+    write(src, b'pixels')
+    key = vtf_cache.cache_key(src, RULE, 'v1')
+    assert vtf_cache.cache_key(src, dict(RULE), 'v1') == key
+
+    assert vtf_cache.cache_key(src, dict(RULE, format='DXT5'), 'v1') != key
+    assert vtf_cache.cache_key(src, dict(RULE, alphaformat='DXT5'), 'v1') != key
+    assert vtf_cache.cache_key(src, dict(RULE, extra_flags=[]), 'v1') != key
+    assert vtf_cache.cache_key(src, RULE, 'v2') != key
+    write(src, b'other pixels')
+    assert vtf_cache.cache_key(src, RULE, 'v1') != key
+
+
+def test_counters(tmp_path):
+    cache = vtf_cache.VTFCache(str(tmp_path / 'cache'))
+    src = str(tmp_path / 'out' / 'a.vtf')
+    write(src, b'vtf')
+    dest = str(tmp_path / 'dest' / 'a.vtf')
+    os.makedirs(os.path.dirname(dest))
+
+    assert not cache.fetch('ab' * 32, dest)
+    cache.store('ab' * 32, src)
+    cache.store('ab' * 32, src)
+    assert cache.fetch('ab' * 32, dest)
+    assert read(dest) == b'vtf'
+    assert cache.stats == {"hits": 1, "misses": 1, "stored": 1, "evicted": 0, "bytes_saved": 3}
+
+    assert cache.save_stats()["hits"] == 1
+    assert cache.save_stats()["hits"] == 2
+
+
+def test_evict_least_recently_used_first(tmp_path):
+    cache = vtf_cache.VTFCache(str(tmp_path / 'cache'))
+    src = str(tmp_path / 'a.vtf')
+    write(src, b'x' * 100)
+    keys = ['aa' * 32, 'bb' * 32, 'cc' * 32]
+    for age, key in enumerate(keys):
+        cache.store(key, src)
+        os.utime(cache._object_path(key), (1000 + age, 1000 + age))
+    # using the oldest entry makes it the newest
+    assert cache.fetch(keys[0], str(tmp_path / 'dest.vtf'))
+
+    assert cache.evict(max_bytes=150) == 2
+    assert os.path.isfile(cache._object_path(keys[0]))
+    assert not os.path.exists(cache._object_path(keys[1]))
+    assert not os.path.exists(cache._object_path(keys[2]))
+    assert cache.stats["evicted"] == 2
+
+
+def test_cache_objects_are_read_only(tmp_path):
+    cache = vtf_cache.VTFCache(str(tmp_path / 'cache'))
+    src = str(tmp_path / 'a.vtf')
+    write(src, b'vtf')
+    cache.store('ab' * 32, src)
+    assert not writable(cache._object_path('ab' * 32))
+
+
+def test_miss_does_not_write_through_linked_output(tmp_path, vtfcmd):
+    cache = vtf_cache.VTFCache(str(tmp_path / 'cache'))
+    src = str(tmp_path / 'in' / 'crate_color.tga')
+    out = str(tmp_path / 'out')
+    write(src, b'old')
+    assert convert_texture(src, out, vtfcmd, RULE, cache).ok
+    # the second output folder gets the cached object
+    other = str(tmp_path / 'other')
+    assert convert_texture(src, other, vtfcmd, RULE, cache).status == CACHED
+    key = cache.key_for(src, RULE, vtfcmd)
+    obj = cache._object_path(key)
+    assert read(obj) == b'DXT1:old'
+
+    # converting without a cache replaces the linked output too
+    assert convert_texture(src, other, vtfcmd, dict(RULE, format='DXT5')).ok
+    assert read(os.path.join(other, 'crate_color.vtf')) == b'DXT5:old'
+    assert read(obj) == b'DXT1:old'
+
+    assert convert_texture(src, other, vtfcmd, RULE, cache).status == CACHED
+    write(src, b'new')
+    assert convert_texture(src, other, vtfcmd, RULE, cache).ok
+    assert read(os.path.join(other, 'crate_color.vtf')) == b'DXT1:new'
+    assert read(obj) == b'DXT1:old'
+
+
+def test_copy_fallback_is_writable(tmp_path, monkeypatch):
+    cache = vtf_cache.VTFCache(str(tmp_path / 'cache'))
+    src = str(tmp_path / 'a.vtf')
+    write(src, b'vtf')
+    cache.store('ab' * 32, src)
+
+    def no_link(src, dest):
+        raise OSError("cross-device link")
+    monkeypatch.setattr(vtf_cache.os, 'link', no_link)
+
+    dest = str(tmp_path / 'dest.vtf')
+    assert cache.fetch('ab' * 32, dest)
+    assert read(dest) == b'vtf'
+    assert writable(dest)
+    assert not writable(cache._object_path('ab' * 32))
+
+
+# another user's object: chmod and utime fail with EPERM even on a
+# world-writable file, and hardlinking is refused by protected_hardlinks
+def test_hit_on_object_owned_by_another_user(tmp_path, monkeypatch):
+    cache = vtf_cache.VTFCache(str(tmp_path / 'cache'))
+    src = str(tmp_path / 'a.vtf')
+    write(src, b'vtf')
+    cache.store('ab' * 32, src)
+    obj = cache._object_path('ab' * 32)
+    os.chmod(obj, 0o666)
+
+    def not_owner(call):
+        def wrapper(path, *args, **kwargs):
+            if path == obj:
+                raise PermissionError(1, "Operation not permitted", path)
+            return call(path, *args, **kwargs)
+        return wrapper
+    for name in ('chmod', 'utime', 'link'):
+        monkeypatch.setattr(vtf_cache.os, name, not_owner(getattr(os, name)))
+
+    dest = str(tmp_path / 'dest.vtf')
+    assert cache.fetch('ab' * 32, dest)
+    assert read(dest) == b'vtf'
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 0
+
+
+def test_cancel_stops_vtfcmd(tmp_path, vtfcmd):
+    src = str(tmp_path / 'in' / 'crate_color.tga')
+    out = str(tmp_path / 'out')
+    write(src, b'pixels')
+    cancel = CancelToken()
+    threading.Timer(0.3, cancel.cancel).start()
+
+    start = time.perf_counter()
+    result = convert_texture(src, out, vtfcmd, dict(RULE, format='SLOW'), cancel=cancel)
+    assert time.perf_counter() - start < 5
+    assert result.status == CANCELLED
+    assert os.listdir(out) == []